@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class DifferentialEqPagination(CursorPagination):
+    """
+    Cursor pagination, so a page costs one query and no COUNT(*).
+    """
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,72 @@
+import json
+import struct
+
+import numpy as np
+
+from rest_framework.renderers import BaseRenderer
+
+
+class TrajectoryRenderer(BaseRenderer):
+    """
+    Compact binary trajectory format.
+
+    Layout: the magic b"DSTR", a version byte, three reserved bytes and the
+    header length as little-endian uint32, then a JSON header padded with
+    spaces so the 12 bytes before it and the header are a multiple of 8
+    bytes, then the arrays listed in the header as raw little-endian float64
+    buffers, each starting at an offset divisible by 8. A uniform x grid is not sent, the
+    header describes it as `{"x0", "h", "n"}` and it is rebuilt as
+    `np.linspace(x0, x0 + h * (n - 1), n)`. The y values of a system are a
+    2-D array, sent row by row with its `shape` in the header.
+
+    Views pass a dict with `meta`, `grid` and `arrays` (name -> ndarray).
+    Any other data (e.g. errors) is sent as `meta` without arrays.
+    """
+    media_type = 'application/vnd.diffsolver.trajectory'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    MAGIC = b'DSTR'
+    VERSION = 1
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, dict) or 'arrays' not in data:
+            data = {'meta': data, 'grid': None, 'arrays': {}}
+
+        arrays = {name: np.ascontiguousarray(values, dtype='<f8') for name, values in data['arrays'].items()}
+        header = json.dumps({
+            'meta': data['meta'],
+            'grid': data['grid'],
+            'arrays': [
+                {'name': name, 'length': values.size, **({'shape': list(values.shape)} if values.ndim > 1 else {})}
+                for name, values in arrays.items()
+            ],
+        }).encode('utf-8')
+        preamble_size = len(self.MAGIC) + struct.calcsize('<B3xI')
+        header += b' ' * (-(preamble_size + len(header)) % 8)
+
+        parts = [self.MAGIC, struct.pack('<B3xI', self.VERSION, len(header)), header]
+        parts.extend(memoryview(values.reshape(-1)).cast('B') for values in arrays.values())
+        return b''.join(parts)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON. Streaming views write their own lines, this
+    renders single responses such as errors as one line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return self.line(data)
+
+    @staticmethod
+    def line(data) -> bytes:
+        return json.dumps(data).encode('utf-8') + b'\n'
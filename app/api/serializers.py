@@ -1,22 +1,52 @@
 import sympy as sp
 import numpy as np
 
+from collections import Counter
+
+from django.db import transaction
 from rest_framework import serializers
-from app.models import DifferentialEq
+from app.models import DifferentialEq, SolveJob
+from app.solvers.compiler import get_compiled
+from app.solvers.decimate import DECIMATORS, reduce
+from app.solvers.engine import solve
+from app.solvers.methods import DEFAULT_TOL, METHODS
+from app.store import format_initial_values, load_or_solve, parse_initial_values, solve_limits
 
 
-x, y = sp.symbols('x y')
+class InitialValuesField(serializers.ListField):
+    """
+    Initial values of a system as a list of numbers, stored as text.
+    """
+    child = serializers.FloatField()
 
+    def to_representation(self, value):
+        return parse_initial_values(value)
 
-class DifferentialEqSerializer(serializers.ModelSerializer):
-    x1_res = serializers.SerializerMethodField()
-    y1_res = serializers.SerializerMethodField()
-    x2_res = serializers.SerializerMethodField()
-    y2_res = serializers.SerializerMethodField()
+
+class DifferentialEqSummarySerializer(serializers.ModelSerializer):
+    """
+    Equation metadata only, without solving it.
+    """
+    initial_values = InitialValuesField(read_only=True)
 
     class Meta:
         model = DifferentialEq
-        fields = '__all__'
+        fields = ('id', 'name', 'func', 'x0', 'y0', 'b', 'h', 'tol', 'initial_values')
+
+
+class EquationParamsSerializer(serializers.ModelSerializer):
+    """
+    Function and parameters of an equation with their validation.
+
+    A system has one right-hand side per variable separated by ';', in x
+    and y1..yn, and its initial values in `initial_values` instead of y0.
+    """
+    y0 = serializers.FloatField(required=False)
+    initial_values = InitialValuesField(required=False)
+
+    class Meta:
+        model = DifferentialEq
+        fields = ('func', 'x0', 'y0', 'b', 'h', 'tol', 'initial_values')
 
     def validate_func(self, f):
         """
@@ -25,38 +55,158 @@ class DifferentialEqSerializer(serializers.ModelSerializer):
         if ',' in f:
             raise serializers.ValidationError("Function should use dots, not commas.")
         try:
-            sp.sympify(f)
+            get_compiled(f)
         except (sp.SympifyError, TypeError):
             raise serializers.ValidationError("Function is not a valid expression.")
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
         return f
     
     def validate(self, data):
         """
-        Validates x0 (a), b and h.
+        Validates x0 (a), b, h and the initial values. Partial updates are
+        checked together with the stored values of the other fields.
         """
+        if self.instance is not None:
+            stored = {field: getattr(self.instance, field) for field in ('func', 'x0', 'y0', 'h', 'b', 'tol')}
+            if 'func' not in data:
+                stored['initial_values'] = parse_initial_values(self.instance.initial_values)
+            data = {**stored, **data}
+        compiled = get_compiled(data['func'])
+        initial_values = data.get('initial_values', [])
+        if compiled.is_system:
+            if len(initial_values) != compiled.n_vars:
+                raise serializers.ValidationError(
+                    f"A system of {compiled.n_vars} needs {compiled.n_vars} values in 'initial_values'."
+                )
+            data['y0'] = initial_values[0]
+        elif initial_values:
+            raise serializers.ValidationError("'initial_values' are only used by systems, set 'y0' instead.")
+        elif 'y0' not in data:
+            raise serializers.ValidationError({'y0': ["This field is required."]})
+        data['initial_values'] = format_initial_values(initial_values)
+
         if data['h'] <= 0:
             raise serializers.ValidationError("Step size 'h' must be non-zero positive value.")
         if data['b'] <= data['x0']:
             raise serializers.ValidationError("'b' must be greater than 'x0'.")
+        if data.get('tol', DEFAULT_TOL) <= 0:
+            raise serializers.ValidationError("Tolerance 'tol' must be non-zero positive value.")
         return data
-    
-    def _get_euler_results(self, obj):
-        if not hasattr(self, '_euler_cache'):
-            self._euler_cache = {}
 
-        key = (obj.func, obj.x0, obj.y0, obj.h, obj.b)
-        if key not in self._euler_cache:
-            self._euler_cache[key] = self.euler_method(obj.func, obj.x0, obj.y0, obj.h, obj.b)
-        return self._euler_cache[key]
+
+class BulkEquationListSerializer(serializers.ListSerializer):
+    """
+    Checks all names with a few queries and inserts the equations with one
+    bulk insert in a single transaction.
+    """
+    NAME_QUERY_BATCH = 500
+
+    def validate(self, attrs):
+        names = [eq['name'] for eq in attrs]
+        duplicates = sorted(name for name, n in Counter(names).items() if n > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate names: {', '.join(duplicates)}.")
+        taken = []
+        for start in range(0, len(names), self.NAME_QUERY_BATCH):
+            batch = names[start:start + self.NAME_QUERY_BATCH]
+            taken.extend(DifferentialEq.objects.filter(name__in=batch).values_list('name', flat=True))
+        if taken:
+            raise serializers.ValidationError(f"Names already exist: {', '.join(sorted(taken))}.")
+        return attrs
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return DifferentialEq.objects.bulk_create([DifferentialEq(**eq) for eq in validated_data])
+
+
+class BulkEquationSerializer(EquationParamsSerializer):
+    """
+    Equation created by the bulk-create endpoint, without solving it.
+    """
+    MAX_ITEMS = 10_000
+
+    class Meta:
+        model = DifferentialEq
+        fields = ('id', 'name', 'func', 'x0', 'y0', 'b', 'h', 'tol', 'initial_values')
+        # Uniqueness of names is checked for the whole list at once
+        extra_kwargs = {'name': {'validators': []}}
+        list_serializer_class = BulkEquationListSerializer
+
+
+class DifferentialEqSerializer(EquationParamsSerializer):
+    x1_res = serializers.SerializerMethodField()
+    y1_res = serializers.SerializerMethodField()
+    x2_res = serializers.SerializerMethodField()
+    y2_res = serializers.SerializerMethodField()
+    termination = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DifferentialEq
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        """
+        Supports sparse fieldsets on reads, e.g. `?fields=id,x1_res,y1_res`.
+        Results that are not requested are not calculated.
+        """
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        fields = request.query_params.get('fields')
+        if fields:
+            requested = {name.strip() for name in fields.split(',')}
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    def _reduce(self, results):
+        """
+        Applies the x window and decimation requested by the view, if any.
+        """
+        params = self.context.get('decimation')
+        if not params:
+            return results
+        return reduce(*results, **params)
+
+    def _get_results(self, obj, method):
+        """
+        Solution of one method, solved within the budget of the request.
+        """
+        if not hasattr(self, '_results_cache'):
+            self._results_cache = {}
+            self._terminations = {}
+            self._limits = self.context.get('limits') or solve_limits()
+
+        key = (obj.func, obj.x0, obj.y0, obj.h, obj.b, obj.initial_values, method)
+        if key not in self._results_cache:
+            stats = {}
+            self._results_cache[key] = self._reduce(load_or_solve(
+                obj.func, obj.x0, obj.y0, obj.h, obj.b, method, obj.tol, obj.initial_values, stats, self._limits,
+            ))
+            self._terminations[key] = stats['termination']
+        return self._results_cache[key]
+
+    def _get_euler_results(self, obj):
+        return self._get_results(obj, 'euler')
 
     def _get_euler_cauchy_results(self, obj):
-        if not hasattr(self, '_euler_cauchy_cache'):
-            self._euler_cauchy_cache = {}
+        return self._get_results(obj, 'euler_cauchy')
 
-        key = (obj.func, obj.x0, obj.y0, obj.h, obj.b)
-        if key not in self._euler_cauchy_cache:
-            self._euler_cauchy_cache[key] = self.euler_cauchy_method(obj.func, obj.x0, obj.y0, obj.h, obj.b)
-        return self._euler_cauchy_cache[key]
+    def terminations(self) -> list[str]:
+        """
+        Termination reasons of all solves made for the serialized data.
+        """
+        return list(getattr(self, '_terminations', {}).values())
+
+    def get_termination(self, obj):
+        """
+        Why each method stopped, e.g. 'diverged' when y blew up before b.
+        """
+        self._get_euler_results(obj)
+        self._get_euler_cauchy_results(obj)
+        key = (obj.func, obj.x0, obj.y0, obj.h, obj.b, obj.initial_values)
+        return {method: self._terminations[(*key, method)] for method in ('euler', 'euler_cauchy')}
 
     def get_x1_res(self, obj):
         """
@@ -90,34 +240,153 @@ class DifferentialEqSerializer(serializers.ModelSerializer):
         """
         Euler Method implementation.
         """
-        symbolic_expr = sp.sympify(func)
-        f = sp.lambdify((x, y), symbolic_expr, "numpy")
-        
-        n_steps = int(np.ceil((b - x0) / h)) + 1
-        x_range = np.linspace(x0, x0 + h * (n_steps - 1), n_steps)
-        
-        y_vals = np.zeros(n_steps)
-        y_vals[0] = y0
-
-        for i in range(1, n_steps):
-            y_vals[i] = y_vals[i - 1] + h * f(x_range[i - 1], y_vals[i - 1])
-        return (x_range, y_vals)
+        return solve(func, 'euler', x0, y0, h, b)
 
     def euler_cauchy_method(self, func: str, x0: float, y0: float, h: float, b: float) -> tuple[np.ndarray, np.ndarray]:
         """
         Euler-Cauchy Method implementation.
         """
-        symbolic_expr = sp.sympify(func)
-        f = sp.lambdify((x, y), symbolic_expr, "numpy")
-        
-        n_steps = int(np.ceil((b - x0) / h)) + 1
-        x_range = np.linspace(x0, x0 + h * (n_steps - 1), n_steps)
-        
-        y_vals = np.zeros(n_steps)
-        y_vals[0] = y0
-
-        for i in range(1, n_steps):
-            f1 = f(x_range[i - 1], y_vals[i - 1])
-            f2 = f(x_range[i], y_vals[i - 1] + h * f1)
-            y_vals[i] = y_vals[i - 1] + (h / 2) * (f1 + f2)
-        return (x_range, y_vals)
+        return solve(func, 'euler_cauchy', x0, y0, h, b)
+
+
+class DecimationSerializer(serializers.Serializer):
+    """
+    Query parameters reducing returned trajectories for plotting.
+    """
+    max_points = serializers.IntegerField(min_value=4, required=False)
+    decimation = serializers.ChoiceField(choices=list(DECIMATORS), default='minmax', source='method')
+    x_min = serializers.FloatField(required=False)
+    x_max = serializers.FloatField(required=False)
+
+    def validate(self, data):
+        if 'x_min' in data and 'x_max' in data and data['x_max'] < data['x_min']:
+            raise serializers.ValidationError("'x_max' must not be less than 'x_min'.")
+        return data
+
+
+class SolveRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=list(METHODS), default='euler')
+
+
+class CompareRequestSerializer(serializers.Serializer):
+    """
+    Query parameters of the method comparison, e.g.
+    `?methods=euler&methods=rk4&reference=exact&max_points=1000`.
+    """
+    methods = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(METHODS)),
+        default=['euler', 'euler_cauchy'],
+        allow_empty=False,
+    )
+    reference = serializers.ChoiceField(choices=['richardson', 'exact'], default='richardson')
+    max_points = serializers.IntegerField(min_value=2, required=False)
+
+
+class SolutionRequestSerializer(SolveRequestSerializer):
+    """
+    Method and optional event functions, e.g. `?method=rk4&events=y-2`.
+    Solving stops where an event function g(x, y) changes sign. `offset`
+    and `limit` select a range of points, e.g. `?offset=1000000&limit=10000`.
+    """
+    events = serializers.ListField(child=serializers.CharField(max_length=1000), required=False, default=list)
+    offset = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_events(self, events):
+        for event in events:
+            try:
+                valid = isinstance(sp.sympify(event), sp.Expr)
+            except (sp.SympifyError, TypeError):
+                valid = False
+            if not valid:
+                raise serializers.ValidationError(f"Event '{event}' is not a valid expression.")
+        return events
+
+
+class StreamRequestSerializer(SolutionRequestSerializer):
+    chunk_size = serializers.IntegerField(min_value=1, max_value=1_000_000, default=10_000)
+
+
+class SolveJobSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = SolveJob
+        fields = ('id', 'equation', 'method', 'status', 'error', 'created_at', 'updated_at')
+
+
+class FloatOrListField(serializers.ListField):
+    """
+    Accepts a single number or a list of numbers, always returns a list.
+    """
+    child = serializers.FloatField()
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            data = [data]
+        return super().to_internal_value(data)
+
+
+class BatchSolveSerializer(serializers.Serializer):
+    """
+    Either a list of equations, or one function with parameter sweeps where
+    single values are repeated for every item of the sweep.
+    """
+    MAX_ITEMS = 1000
+    MAX_POINTS = 10_000_000
+
+    equations = EquationParamsSerializer(many=True, required=False)
+    func = serializers.CharField(max_length=1000, required=False)
+    x0 = FloatOrListField(required=False)
+    y0 = FloatOrListField(required=False)
+    b = FloatOrListField(required=False)
+    h = FloatOrListField(required=False)
+    tol = FloatOrListField(required=False)
+    methods = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(METHODS)),
+        default=['euler', 'euler_cauchy'],
+        allow_empty=False,
+    )
+
+    def validate(self, data):
+        """
+        Expands sweeps into equations and checks the size of the batch.
+        """
+        if 'equations' in data:
+            equations = data['equations']
+        else:
+            equations = self._expand_sweep(data)
+
+        if not equations:
+            raise serializers.ValidationError("At least one equation is required.")
+        if any(eq.pop('initial_values') for eq in equations):
+            raise serializers.ValidationError("Batch solves do not support systems.")
+        if len(equations) > self.MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {self.MAX_ITEMS} equations can be solved at once.")
+        n_steps = max(int(np.ceil((eq['b'] - eq['x0']) / eq['h'])) + 1 for eq in equations)
+        if n_steps * len(equations) > self.MAX_POINTS:
+            raise serializers.ValidationError(f"The batch is limited to {self.MAX_POINTS} points.")
+        return {'equations': equations, 'methods': data['methods']}
+
+    def _expand_sweep(self, data):
+        missing = [name for name in ('func', 'x0', 'y0', 'b', 'h') if name not in data]
+        if missing:
+            raise serializers.ValidationError(
+                "Provide 'equations' or 'func' with " + ", ".join(f"'{name}'" for name in missing) + "."
+            )
+        sweep = [name for name in ('x0', 'y0', 'b', 'h', 'tol') if name in data]
+        lengths = {len(data[name]) for name in sweep} - {1}
+        if len(lengths) > 1:
+            raise serializers.ValidationError("Parameter lists must have the same length.")
+        size = lengths.pop() if lengths else 1
+
+        items = [
+            {
+                'func': data['func'],
+                **{name: data[name][i if len(data[name]) > 1 else 0] for name in sweep},
+            }
+            for i in range(size)
+        ]
+        equations = EquationParamsSerializer(data=items, many=True)
+        if not equations.is_valid():
+            raise serializers.ValidationError({'equations': equations.errors})
+        return equations.validated_data
@@ -1,9 +1,10 @@
 from rest_framework import routers
-from app.api.views import DifferentialEqViewSet
+from app.api.views import DifferentialEqViewSet, SolveJobViewSet
 
 
 app_name = 'api_app'
 
 router = routers.DefaultRouter()
 router.register(r'differentialeq', DifferentialEqViewSet, basename='create')
+router.register(r'jobs', SolveJobViewSet, basename='jobs')
 urlpatterns = router.urls
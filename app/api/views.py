@@ -1,20 +1,491 @@
+import hashlib
+import json
+
+import numpy as np
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
 from rest_framework import viewsets
 from rest_framework import filters
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from app import jobs, pool
+from app.models import DifferentialEq, SolveJob
+from app.api.pagination import DifferentialEqPagination
+from app.api.renderers import NDJSONRenderer, TrajectoryRenderer
+from app.api.serializers import (
+    BatchSolveSerializer,
+    BulkEquationSerializer,
+    CompareRequestSerializer,
+    DecimationSerializer,
+    DifferentialEqSerializer,
+    DifferentialEqSummarySerializer,
+    SolveJobSerializer,
+    SolutionRequestSerializer,
+    SolveRequestSerializer,
+    StreamRequestSerializer,
+)
+from app.solvers.analysis import compare_methods
+from app.solvers.compiler import expression_cache, get_compiled
+from app.solvers.decimate import reduce
+from app.solvers.engine import (
+    BUDGET_TERMINATIONS, check_method, count_steps, iter_solve, solve_batch, solve_with_stats,
+)
+from app.solvers.methods import DEFAULT_TOL, METHODS
+from app.store import initial_state, load_or_solve, load_trajectory, solve_limits
 
-from app.models import DifferentialEq
-from app.api.serializers import DifferentialEqSerializer
+
+# Bump when solver changes alter results, so cached representations are refetched.
+ETAG_VERSION = 7
 
 
 class DifferentialEqViewSet(viewsets.ModelViewSet):
     queryset = DifferentialEq.objects.all()
     serializer_class = DifferentialEqSerializer
+    pagination_class = DifferentialEqPagination
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, TrajectoryRenderer)
 
     filter_backends = (filters.OrderingFilter, DjangoFilterBackend)
-    filterset_fields = ('id',)
+    # `?id__gt=` lets clients fetch only equations created since their last refresh
+    filterset_fields = {'id': ['exact', 'gt']}
     permission_classes = (AllowAny,)
 
     ordering_filter = ('id',)
     ordering = ('-id',)
 
+    def get_serializer_class(self):
+        """
+        The list returns metadata only unless fields are requested explicitly.
+        """
+        if self.action == 'list' and 'fields' not in self.request.query_params:
+            return DifferentialEqSummarySerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        """
+        Adds the validated decimation parameters (`max_points`, `decimation`,
+        `x_min`, `x_max`) of GET requests.
+        """
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method == 'GET':
+            context['decimation'] = self._decimation_params()
+        return context
+
+    def _decimation_params(self):
+        params = DecimationSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        if data.keys() <= {'method'}:
+            return None
+        return data
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Besides JSON, serves the binary trajectory format when it is requested
+        with `Accept: application/vnd.diffsolver.trajectory` or `?format=bin`.
+        """
+        equation = self.get_object()
+        etag, not_modified = self._conditional(equation)
+        if not_modified is not None:
+            return not_modified
+
+        if request.accepted_renderer.format != TrajectoryRenderer.format:
+            serializer = self.get_serializer(equation)
+            return self._cacheable(Response(serializer.data), etag, serializer.terminations())
+
+        params = (equation.func, equation.x0, equation.y0, equation.h, equation.b)
+        limits = solve_limits()
+        stats1, stats2 = {}, {}
+        x1_vals, y1_vals = load_or_solve(*params, 'euler', equation.tol, equation.initial_values, stats1, limits)
+        x2_vals, y2_vals = load_or_solve(*params, 'euler_cauchy', equation.tol, equation.initial_values, stats2, limits)
+        meta = {
+            **DifferentialEqSummarySerializer(equation).data,
+            'termination': {'euler': stats1['termination'], 'euler_cauchy': stats2['termination']},
+        }
+
+        terminations = (stats1['termination'], stats2['termination'])
+
+        decimation = self._decimation_params()
+        if decimation is None and len(x1_vals) == len(x2_vals):
+            return self._cacheable(Response({
+                'meta': meta,
+                'grid': {'x0': equation.x0, 'h': equation.h, 'n': len(x1_vals)},
+                'arrays': {'y1_res': y1_vals, 'y2_res': y2_vals},
+            }), etag, terminations)
+
+        # Decimated points are no longer on the uniform grid, and solutions
+        # that stopped early end at different points.
+        if decimation is not None:
+            x1_vals, y1_vals = reduce(x1_vals, y1_vals, **decimation)
+            x2_vals, y2_vals = reduce(x2_vals, y2_vals, **decimation)
+        return self._cacheable(Response({
+            'meta': meta,
+            'grid': None,
+            'arrays': {'x1_res': x1_vals, 'y1_res': y1_vals, 'x2_res': x2_vals, 'y2_res': y2_vals},
+        }), etag, terminations)
+
+    def _conditional(self, equation):
+        """
+        Strong ETag of the requested representation of the equation and a
+        304 response if the client already has it, checked before solving.
+
+        Solutions are deterministic, so the ETag is derived from the equation
+        parameters, the action, the query and the negotiated media type.
+        """
+        request = self.request
+        key = json.dumps([
+            ETAG_VERSION,
+            DifferentialEqSummarySerializer(equation).data,
+            self.action,
+            request.accepted_renderer.media_type,
+            sorted(request.query_params.lists()),
+        ])
+        etag = quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            self._cacheable(not_modified, etag)
+        return (etag, not_modified)
+
+    @staticmethod
+    def _cacheable(response, etag, terminations=()):
+        """
+        Add the ETag and the cache headers. Solutions cut by the budget of
+        the request (see store.save_trajectory) are not cached, the next
+        request may get further.
+        """
+        if any(termination in BUDGET_TERMINATIONS for termination in terminations):
+            patch_cache_control(response, no_store=True)
+            return response
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.SOLVER_CACHE_MAX_AGE)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """
+        Hit/miss/eviction counters of the compiled-expression cache.
+        """
+        return Response(expression_cache.stats())
+
+    @action(detail=True, methods=['get'])
+    def solution(self, request, pk=None):
+        """
+        Trajectory of any registered method, e.g. `?method=rk45`. Supports
+        decimation and the binary format like retrieve. With `?events=g`
+        solving stops where g(x, y) changes sign, such solutions are not
+        stored. `termination` tells why the trajectory ends.
+
+        `offset` and `limit` return a range of the points, `points` is the
+        length of the whole trajectory. Ranges of archived trajectories are
+        read from their memory maps, so paging through a long solution
+        keeps memory flat.
+        """
+        params = SolutionRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        method = params.validated_data['method']
+        events = params.validated_data['events']
+        offset = params.validated_data['offset']
+        limit = params.validated_data.get('limit')
+
+        equation = self.get_object()
+        etag, not_modified = self._conditional(equation)
+        if not_modified is not None:
+            return not_modified
+
+        stats = {}
+        limits = solve_limits()
+        try:
+            if events:
+                y0 = initial_state(equation.y0, equation.initial_values)
+                args = (equation.func, method, equation.x0, y0, equation.h, equation.b, equation.tol, events)
+                x_vals, y_vals, stats = pool.call(
+                    solve_with_stats, *args, limits['max_steps'], limits['deadline'],
+                    n_steps=count_steps(equation.x0, equation.h, equation.b),
+                )
+            else:
+                x_vals, y_vals = load_or_solve(
+                    equation.func, equation.x0, equation.y0, equation.h, equation.b, method, equation.tol,
+                    equation.initial_values, stats, limits,
+                )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        n_points = len(x_vals)
+        stop = None if limit is None else offset + limit
+        x_vals, y_vals = x_vals[offset:stop], y_vals[offset:stop]
+        decimation = self._decimation_params()
+        if decimation is not None:
+            x_vals, y_vals = reduce(x_vals, y_vals, **decimation)
+
+        meta = {
+            **DifferentialEqSummarySerializer(equation).data,
+            'method': method,
+            'termination': stats['termination'],
+            'points': n_points,
+        }
+        if request.accepted_renderer.format == TrajectoryRenderer.format:
+            response = Response({'meta': meta, 'grid': None, 'arrays': {'x_res': x_vals, 'y_res': y_vals}})
+        else:
+            response = Response({**meta, 'x_res': x_vals.tolist(), 'y_res': y_vals.tolist()})
+        return self._cacheable(response, etag, (stats['termination'],))
+
+    @action(detail=True, methods=['get'])
+    def compare(self, request, pk=None):
+        """
+        Solve with several methods in one pass and compare them: per-method
+        difference curves from the reference with their max and RMS, and
+        Richardson error estimates from the solutions with step 2h, stored
+        ones (e.g. from before h was halved) are not solved again.
+        `?reference=exact` compares with sympy's closed-form solution.
+        `max_points` samples the returned curves, the statistics always
+        cover every point.
+        """
+        params = CompareRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        methods = list(dict.fromkeys(data['methods']))
+
+        equation = self.get_object()
+        etag, not_modified = self._conditional(equation)
+        if not_modified is not None:
+            return not_modified
+
+        y0 = initial_state(equation.y0, equation.initial_values)
+        limits = solve_limits()
+        coarse = {}
+        for method in methods:
+            stored = None if METHODS[method].adaptive else load_trajectory(
+                equation.func, equation.x0, equation.y0, 2 * equation.h, equation.b, method, equation.tol,
+                equation.initial_values,
+            )
+            if stored is not None:
+                coarse[method] = stored[1]
+        args = (equation.func, methods, equation.x0, y0, equation.h, equation.b, equation.tol, data['reference'],
+                limits['max_steps'], limits['deadline'], coarse)
+        n_coarse = sum(not METHODS[method].adaptive and method not in coarse for method in methods)
+        n_steps = (len(methods) * count_steps(equation.x0, equation.h, equation.b)
+                   + n_coarse * count_steps(equation.x0, 2 * equation.h, equation.b))
+        try:
+            comparison = pool.call(compare_methods, *args, n_steps=n_steps)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def sample(values):
+            if values is None:
+                return None
+            if data.get('max_points') and len(values) > data['max_points']:
+                values = values[np.linspace(0, len(values) - 1, data['max_points']).astype(int)]
+            return values.tolist()
+
+        results = {}
+        for method, result in comparison['methods'].items():
+            results[method] = {
+                key: sample(value) if isinstance(value, np.ndarray) else value
+                for key, value in result.items()
+            }
+        return self._cacheable(Response({
+            **DifferentialEqSummarySerializer(equation).data,
+            'reference': comparison['reference'],
+            'x': sample(comparison['x']),
+            'exact': sample(comparison['exact']),
+            'methods': results,
+        }), etag, [
+            termination
+            for result in results.values()
+            for termination in (result['termination'], result.get('estimate_termination'))
+        ])
+
+    @action(detail=True, methods=['post'])
+    def solve(self, request, pk=None):
+        """
+        Start a background solve of the equation and return the job.
+        """
+        params = SolveRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        job, _ = jobs.submit(self.get_object(), params.validated_data['method'])
+        return Response(
+            SolveJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED if job.status == SolveJob.PENDING else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=['get'], renderer_classes=(NDJSONRenderer, JSONRenderer))
+    def stream(self, request, pk=None):
+        """
+        Stream the trajectory of one method as NDJSON: a header line with the
+        equation, one `{"x": [...], "y": [...]}` line per chunk and a final
+        `{"done": true, "termination": ...}` line. Only one chunk is held in
+        memory at a time. `events`, `offset` and `limit` work like in
+        `solution`, a solve for a range stops at its end.
+        """
+        params = StreamRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        method = params.validated_data['method']
+        chunk_size = params.validated_data['chunk_size']
+        events = params.validated_data['events']
+        offset = params.validated_data['offset']
+        limit = params.validated_data.get('limit')
+
+        equation = self.get_object()
+        etag, not_modified = self._conditional(equation)
+        if not_modified is not None:
+            return not_modified
+
+        try:
+            check_method(equation.func, method, events)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        stats = {}
+        args = (equation.func, equation.x0, equation.y0, equation.h, equation.b)
+        stored = None if events else load_trajectory(*args, method, equation.tol, equation.initial_values, stats)
+        if stored is not None:
+            x_vals, y_vals = stored
+            stop = len(x_vals) if limit is None else min(offset + limit, len(x_vals))
+            chunks = (
+                (x_vals[i:min(i + chunk_size, stop)], y_vals[i:min(i + chunk_size, stop)])
+                for i in range(offset, stop, chunk_size)
+            )
+        else:
+            y0 = initial_state(equation.y0, equation.initial_values)
+            limits = solve_limits()
+            if limit is not None:
+                last_step = offset + limit - 1
+                limits['max_steps'] = last_step if limits['max_steps'] is None else min(limits['max_steps'], last_step)
+            chunks = _skip_points(iter_solve(equation.func, method, equation.x0, y0, equation.h, equation.b,
+                                             chunk_size, equation.tol, stats, events, **limits), offset)
+
+        header = {**DifferentialEqSummarySerializer(equation).data, 'method': method}
+        lines = _ndjson_stream(header, chunks, stats)
+        if isinstance(request._request, ASGIRequest):
+            lines = _async_lines(lines)
+        response = StreamingHttpResponse(lines, content_type=NDJSONRenderer.media_type)
+        if stored is None:
+            # Why a live solve ends is only known after the headers are sent.
+            patch_cache_control(response, no_store=True)
+            return response
+        return self._cacheable(response, etag, (stats['termination'],))
+
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """
+        Create a list of equations in one transaction, without solving them.
+        """
+        serializer = BulkEquationSerializer(
+            data=request.data, many=True, allow_empty=False, max_length=BulkEquationSerializer.MAX_ITEMS,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='batch-solve')
+    def batch_solve(self, request):
+        """
+        Solve many equations or parameter sweeps without storing them.
+        Equations with the same right-hand side are stepped together. All
+        solves share the budget of the request, every result reports its
+        `termination`.
+        """
+        params = BatchSolveSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        equations = params.validated_data['equations']
+        methods = params.validated_data['methods']
+
+        groups = {}
+        for i, eq in enumerate(equations):
+            groups.setdefault(get_compiled(eq['func']).expr, []).append(i)
+
+        results = [dict(eq) for eq in equations]
+        limits = solve_limits()
+        for indices in groups.values():
+            func = equations[indices[0]]['func']
+            columns = {
+                name: [equations[i][name] for i in indices]
+                for name in ('x0', 'y0', 'h', 'b')
+            }
+            columns['tol'] = [equations[i].get('tol', DEFAULT_TOL) for i in indices]
+            n_steps = sum(map(count_steps, columns['x0'], columns['h'], columns['b']))
+            for method in methods:
+                solutions = pool.call(solve_batch, func, method, *columns.values(), limits['max_steps'],
+                                      limits['deadline'], n_steps=n_steps)
+                for i, (x_vals, y_vals, termination) in zip(indices, solutions):
+                    results[i][method] = {'x_res': x_vals.tolist(), 'y_res': y_vals.tolist(), 'termination': termination}
+        return Response({'results': results})
+
+
+def _skip_points(chunks, n):
+    for x_vals, y_vals in chunks:
+        if n >= len(x_vals):
+            n -= len(x_vals)
+            continue
+        yield (x_vals[n:], y_vals[n:])
+        n = 0
+
+
+def _ndjson_stream(header, chunks, stats):
+    yield NDJSONRenderer.line(header)
+    try:
+        for x_vals, y_vals in chunks:
+            yield NDJSONRenderer.line({'x': x_vals.tolist(), 'y': y_vals.tolist()})
+    except Exception as e:
+        # The status line is already sent, report the failure in the stream.
+        yield NDJSONRenderer.line({'error': str(e) or type(e).__name__})
+        return
+    yield NDJSONRenderer.line({'done': True, 'termination': stats.get('termination')})
+
+
+async def _async_lines(lines):
+    """
+    Hand out the lines of a stream one at a time, each produced in a thread.
+    Under ASGI Django would read a synchronous iterator to the end before
+    sending anything.
+    """
+    # The chunks come from the solver or memory maps and do not use the database.
+    next_line = sync_to_async(next, thread_sensitive=False)
+    done = object()
+    while (line := await next_line(lines, done)) is not done:
+        yield line
+
+
+class SolveJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = SolveJob.objects.all()
+    serializer_class = SolveJobSerializer
+    pagination_class = DifferentialEqPagination
+
+    filter_backends = (DjangoFilterBackend,)
+    filterset_fields = ('equation', 'status')
+    permission_classes = (AllowAny,)
+
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        """
+        Return the trajectory of a finished job.
+        """
+        job = self.get_object()
+        if job.status == SolveJob.PENDING:
+            return Response(SolveJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+        if job.status == SolveJob.FAILED:
+            return Response(SolveJobSerializer(job).data, status=status.HTTP_409_CONFLICT)
+
+        stats = {}
+        trajectory = load_trajectory(job.func, job.x0, job.y0, job.h, job.b, job.method, job.tol,
+                                     job.initial_values, stats)
+        if trajectory is None:
+            return Response({"detail": "Result is no longer stored, submit the job again."},
+                            status=status.HTTP_410_GONE)
+        x_vals, y_vals = trajectory
+        return Response({
+            **SolveJobSerializer(job).data,
+            'termination': stats['termination'],
+            'x_res': x_vals.tolist(),
+            'y_res': y_vals.tolist(),
+        })
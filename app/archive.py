@@ -0,0 +1,137 @@
+"""
+On-disk archive of long trajectories.
+
+Solutions with many points are not kept as database blobs but as a pair of
+.npy files (x and y) named after a hash of their parameters. The worker
+that solves them appends every chunk to the files as it is produced, and
+requests map the files with np.load(mmap_mode='r'), so slices are read
+from disk on demand and no process holds a whole trajectory in memory.
+
+The functions here run in pool workers as well and do not use Django.
+"""
+import hashlib
+import os
+import uuid
+
+from pathlib import Path
+
+import numpy as np
+
+from app.solvers.engine import iter_solve
+
+
+# Points solved and written at a time
+WRITE_CHUNK = 1_000_000
+
+
+def new_name(params: dict) -> str:
+    """
+    File name (without suffix) for a solve of the parameters: their hash
+    and a random part, so concurrent solves of the same parameters do not
+    write to the same files and each can remove its own.
+    """
+    key = repr(sorted(params.items()))
+    return f'{hashlib.sha256(key.encode()).hexdigest()[:32]}-{uuid.uuid4().hex[:12]}'
+
+
+def paths(directory, name: str) -> tuple[Path, Path]:
+    directory = Path(directory)
+    return (directory / f'{name}.x.npy', directory / f'{name}.y.npy')
+
+
+def load(directory, name: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    The archived trajectory as read-only memory maps, or None when its
+    files are missing.
+    """
+    x_path, y_path = paths(directory, name)
+    try:
+        return (np.load(x_path, mmap_mode='r'), np.load(y_path, mmap_mode='r'))
+    except FileNotFoundError:
+        return None
+
+
+def remove(directory, names):
+    """
+    Delete the files of archived trajectories. Maps that are still open
+    stay readable where the OS allows it.
+    """
+    for name in names:
+        for path in paths(directory, name):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+class _NpyWriter:
+    """
+    Appends rows to a .npy file whose length is not known in advance.
+
+    numpy pads .npy headers so the first dimension can grow without
+    changing the header size, which lets the final shape be written over
+    a placeholder once all rows are in.
+    """
+
+    def __init__(self, path: Path, row_shape: tuple = ()):
+        self.file = open(path, 'wb')
+        self.rows = 0
+        self.row_shape = row_shape
+        self._write_header()
+
+    def append(self, values: np.ndarray):
+        np.ascontiguousarray(values, dtype='<f8').tofile(self.file)
+        self.rows += len(values)
+
+    def close(self):
+        data_start = self.header_size
+        self.file.seek(0)
+        self._write_header()
+        if self.header_size != data_start:
+            raise ValueError("The .npy header changed size.")
+        self.file.close()
+
+    def _write_header(self):
+        header = {'descr': '<f8', 'fortran_order': False, 'shape': (self.rows, *self.row_shape)}
+        np.lib.format.write_array_header_1_0(self.file, header)
+        self.header_size = self.file.tell()
+
+
+def solve_into(directory, name: str, func: str, method: str, x0: float, y0, h: float, b: float, tol: float,
+               max_steps: int | None = None, deadline: float | None = None, prefix=None) -> dict:
+    """
+    Solve like engine.solve and write the trajectory into the archive
+    chunk by chunk, returning only the stats ('archive' with the name,
+    'points' and 'termination').
+
+    A `prefix` to extend is either arrays or the name of an archived
+    trajectory, which is mapped here rather than sent to the worker. The
+    files are written under temporary names and renamed when complete, so
+    readers never see a partial trajectory.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    if isinstance(prefix, str):
+        prefix = load(directory, prefix)
+    stats = {}
+    chunks = iter_solve(func, method, x0, y0, h, b, WRITE_CHUNK, tol, stats, (), max_steps, deadline, prefix)
+
+    targets = paths(directory, name)
+    temporary = [path.with_name(f'{path.name}.{os.getpid()}.tmp') for path in targets]
+    writers = [_NpyWriter(temporary[0]), _NpyWriter(temporary[1], np.shape(y0))]
+    try:
+        for x_vals, y_vals in chunks:
+            writers[0].append(x_vals)
+            writers[1].append(y_vals)
+        for writer in writers:
+            writer.close()
+        for path, target in zip(temporary, targets):
+            os.replace(path, target)
+    except BaseException:
+        for writer in writers:
+            writer.file.close()
+        for path in temporary:
+            path.unlink(missing_ok=True)
+        raise
+    stats['archive'] = name
+    stats['points'] = writers[0].rows
+    return stats
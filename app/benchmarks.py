@@ -0,0 +1,157 @@
+"""
+Benchmarks of the solver kernels and the API.
+
+Every case returns the best wall time of a few repeats in seconds. Cases are
+named `group/...` so results can be saved as a JSON baseline and compared
+case by case later, see the `benchmark` management command.
+"""
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+
+from app.api.renderers import TrajectoryRenderer
+from app.api.serializers import DifferentialEqSerializer
+from app.models import DifferentialEq
+from app.solvers.compiler import compile_expression
+from app.solvers.engine import solve
+
+
+EXPRESSIONS = {
+    'simple': "x + y",
+    'medium': "x*exp(-y) + sin(x)**2",
+    'complex': "sqrt(1 + x**2)*cos(y) - log(1 + y**2)/(1 + x**2) + atan(x*y)",
+}
+
+KERNEL_METHODS = ('euler', 'euler_cauchy', 'rk4')
+
+
+def best_time(func, repeat: int = 3) -> float:
+    """
+    Best wall time of `repeat` calls of func.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def step_counts(max_steps: int) -> list[int]:
+    counts = []
+    n = 100
+    while n <= max_steps:
+        counts.append(n)
+        n *= 10
+    return counts
+
+
+def kernel_cases(max_steps: int, repeat: int) -> dict[str, float]:
+    """
+    Solve time over step counts from 10^2 to max_steps, for every fixed-step
+    method and expression complexity, with warmed-up compilation.
+    """
+    results = {}
+    for label, func in EXPRESSIONS.items():
+        compiled = compile_expression(func)
+        for method in KERNEL_METHODS:
+            for n_steps in step_counts(max_steps):
+                h = 1 / n_steps
+                # Warm up: JIT compilation is cached per expression and method.
+                solve(compiled, method, 0.0, 1.0, h, 1.0)
+                results[f'kernel/{method}/{label}/{n_steps:.0e}'] = best_time(
+                    lambda: solve(compiled, method, 0.0, 1.0, h, 1.0), repeat,
+                )
+    return results
+
+
+def api_cases(n_equations: int, n_steps: int, repeat: int) -> dict[str, float]:
+    """
+    End-to-end latency through the Django test client and rendering cost.
+
+    Expects an empty test database and n_equations > repeat.
+    """
+    client = Client()
+    h = 1 / n_steps
+    equations = DifferentialEq.objects.bulk_create([
+        DifferentialEq(name=f"benchmark {i}", func=EXPRESSIONS['medium'], x0=0.0, y0=float(i), b=1.0, h=h)
+        for i in range(n_equations)
+    ])
+    results = {}
+
+    def retrieve(equation, **extra):
+        response = client.get(f'/api/differentialeq/{equation.pk}/', **extra)
+        assert response.status_code == 200, response.status_code
+
+    # Solving on the first read: every repeat uses an equation that is not
+    # stored yet, after a warm-up that fills the compiled-expression cache.
+    retrieve(equations[0])
+    unstored = iter(equations[1:])
+    results[f'api/retrieve-unstored/{n_steps:.0e}'] = best_time(lambda: retrieve(next(unstored)), repeat)
+    results[f'api/retrieve-stored/{n_steps:.0e}'] = best_time(lambda: retrieve(equations[0]), repeat)
+    results[f'api/retrieve-binary/{n_steps:.0e}'] = best_time(
+        lambda: retrieve(equations[0], HTTP_ACCEPT=TrajectoryRenderer.media_type), repeat,
+    )
+
+    def list_page():
+        response = client.get('/api/differentialeq/', {'page_size': 1000})
+        assert response.status_code == 200, response.status_code
+
+    results[f'api/list/{n_equations}'] = best_time(list_page, repeat)
+
+    data = DifferentialEqSerializer(equations[0]).data
+    results[f'render/json/{n_steps:.0e}'] = best_time(lambda: JSONRenderer().render(data), repeat)
+    return results
+
+
+def load_test(url: str, n_requests: int, concurrency: int, n_steps: int) -> dict[str, float]:
+    """
+    Send n_requests CPU-bound batch solves to a running server from
+    `concurrency` client threads and return the throughput and latencies.
+    """
+    endpoint = url.rstrip('/') + '/api/differentialeq/batch-solve/'
+    payload = {'func': EXPRESSIONS['medium'], 'x0': 0.0, 'b': 1.0, 'h': 1 / n_steps, 'methods': ['rk4']}
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def send(i):
+        start = time.perf_counter()
+        response = session.post(endpoint, json={**payload, 'y0': float(i)})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        latencies = np.array(list(executor.map(send, range(n_requests))))
+    elapsed = time.perf_counter() - start
+    return {
+        'throughput': n_requests / elapsed,
+        'p50': float(np.percentile(latencies, 50)),
+        'p95': float(np.percentile(latencies, 95)),
+    }
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[dict]:
+    """
+    Compare results with a baseline. A case regresses when it is slower than
+    the baseline by more than `tolerance` (0.25 = 25%).
+    """
+    rows = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name] if baseline[name] else float('inf')
+        rows.append({
+            'name': name,
+            'baseline': baseline[name],
+            'current': seconds,
+            'ratio': ratio,
+            'regression': ratio > 1 + tolerance,
+        })
+    return rows
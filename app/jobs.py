@@ -0,0 +1,127 @@
+"""
+Background solve jobs.
+
+Solves run in the local process pool of app.pool, so long calculations do
+not block the request threads and no external broker is needed. Job state lives in the
+database and results go to the trajectory store, where the regular
+endpoints pick them up.
+"""
+import logging
+import os
+import socket
+
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from app import pool
+from app.models import DifferentialEq, SolveJob
+from app.solvers.engine import MAX_STEPS, MAX_TIME
+from app.store import load_trajectory, params_of, solve_call, solve_limits, store_result, stored_prefix
+
+
+logger = logging.getLogger(__name__)
+
+def submit(equation: DifferentialEq, method: str) -> tuple[SolveJob, bool]:
+    """
+    Submit a solve of the equation and return (job, created).
+
+    A pending job for the same parameters is reused instead of starting a
+    duplicate solve, unless the server process running it is gone, and
+    already stored results complete the job at once.
+    """
+    params = params_of(equation)
+    fresh_after = timezone.now() - timedelta(seconds=settings.SOLVER_JOB_STALE_AFTER)
+    pending = SolveJob.objects.filter(
+        status=SolveJob.PENDING, method=method, created_at__gte=fresh_after, **params,
+    ).order_by('-id').first()
+    if pending is not None:
+        if _running(pending.worker):
+            return (pending, False)
+        _finish(pending.pk, SolveJob.FAILED, "The server process running the job exited.")
+
+    if load_trajectory(method=method, **params) is not None:
+        done = SolveJob.objects.filter(status=SolveJob.DONE, method=method, **params).order_by('-id').first()
+        if done is not None:
+            return (done, False)
+        return (SolveJob.objects.create(equation=equation, method=method, status=SolveJob.DONE, **params), True)
+
+    job = SolveJob.objects.create(equation=equation, method=method, worker=_worker_name(), **params)
+
+    limits = solve_limits(settings.SOLVER_JOB_MAX_SECONDS)
+    # A stored solution on a shorter interval is extended instead of solved again.
+    prefix, prefix_b = stored_prefix(job.func, job.x0, job.y0, job.h, job.b, method, job.tol, job.initial_values)
+    fn, args = solve_call(job.func, job.x0, job.y0, job.h, job.b, method, job.tol, job.initial_values, limits, prefix)
+    future = pool.submit(fn, *args)
+    future.add_done_callback(lambda f: _on_done(job.pk, f, prefix_b))
+    return (job, True)
+
+
+def _on_done(job_pk, future, prefix_b=None):
+    try:
+        job = SolveJob.objects.get(pk=job_pk)
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            pool.reset_executor()
+            _finish(job_pk, SolveJob.FAILED, "Worker process crashed.")
+            return
+        except Exception as e:
+            _finish(job_pk, SolveJob.FAILED, str(e) or type(e).__name__)
+            return
+        x_vals, _, stats = store_result(result, job.func, job.x0, job.y0, job.h, job.b, job.method, job.tol,
+                                        job.initial_values, prefix_b)
+        # Results cut by the step or time limit are not stored.
+        if stats['termination'] == MAX_TIME:
+            _finish(job_pk, SolveJob.FAILED, f"Stopped by the time limit at x = {x_vals[-1]}.")
+            return
+        if stats['termination'] == MAX_STEPS:
+            _finish(job_pk, SolveJob.FAILED, f"Stopped by the step limit at x = {x_vals[-1]}.")
+            return
+        _finish(job_pk, SolveJob.DONE)
+    except SolveJob.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception("Could not store the result of solve job %s", job_pk)
+        _finish(job_pk, SolveJob.FAILED, "Could not store the result.")
+    finally:
+        close_old_connections()
+
+
+def fail_own_jobs():
+    """
+    Mark the jobs still pending in this process as failed, for a server
+    process that exits before its pool finished them.
+    """
+    SolveJob.objects.filter(status=SolveJob.PENDING, worker=_worker_name()).update(
+        status=SolveJob.FAILED, error="The server process running the job exited.", updated_at=timezone.now(),
+    )
+
+
+def _worker_name() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _running(worker: str) -> bool:
+    """
+    Whether the server process of a job may still run it. Processes on
+    other hosts cannot be checked, their jobs expire after
+    SOLVER_JOB_STALE_AFTER.
+    """
+    host, _, pid = worker.rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _finish(job_pk, status, error=''):
+    SolveJob.objects.filter(pk=job_pk).update(status=status, error=error, updated_at=timezone.now())
@@ -0,0 +1,72 @@
+import json
+import platform
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from app import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Benchmark the solver kernels and the API, optionally against a saved baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-steps', type=float, default=1e6,
+                            help="Largest step count of the kernel cases (up to 1e7).")
+        parser.add_argument('--repeat', type=int, default=3, help="Repeats per case, the best time counts.")
+        parser.add_argument('--equations', type=int, default=1000, help="Equations created for the list case.")
+        parser.add_argument('--api-steps', type=float, default=1e5, help="Step count of the API cases.")
+        parser.add_argument('--only', choices=('kernels', 'api'), help="Run one group of cases.")
+        parser.add_argument('--save', type=Path, help="Write the results as a JSON baseline.")
+        parser.add_argument('--compare', type=Path, help="Compare with a JSON baseline, fail on regressions.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed slowdown against the baseline (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        if options['equations'] <= options['repeat']:
+            raise CommandError("--equations must be greater than --repeat.")
+
+        results = {}
+        if options['only'] in (None, 'kernels'):
+            results.update(benchmarks.kernel_cases(int(options['max_steps']), options['repeat']))
+        if options['only'] in (None, 'api'):
+            results.update(self._api_cases(options))
+
+        for name, seconds in results.items():
+            self.stdout.write(f"{name:<45} {seconds * 1000:12.3f} ms")
+
+        if options['save']:
+            options['save'].parent.mkdir(parents=True, exist_ok=True)
+            options['save'].write_text(json.dumps({
+                'machine': platform.node(),
+                'python': platform.python_version(),
+                'results': results,
+            }, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['save']}"))
+
+        if options['compare']:
+            baseline = json.loads(options['compare'].read_text())['results']
+            rows = benchmarks.compare(results, baseline, options['tolerance'])
+            regressions = [row for row in rows if row['regression']]
+            for row in rows:
+                line = f"{row['name']:<45} {row['ratio']:7.2f}x"
+                self.stdout.write(self.style.ERROR(line) if row['regression'] else line)
+            if regressions:
+                raise CommandError(f"{len(regressions)} case(s) slower than the baseline by more than "
+                                   f"{options['tolerance']:.0%}.")
+            self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    def _api_cases(self, options):
+        # Run against a throwaway test database, like the test runner does.
+        setup_test_environment(debug=settings.DEBUG)
+        runner = DiscoverRunner(verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            return benchmarks.api_cases(options['equations'], int(options['api_steps']), options['repeat'])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
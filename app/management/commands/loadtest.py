@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Measure request throughput of the production server for a growing number of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Load an already running server instead of starting gunicorn.")
+        parser.add_argument('--workers', type=int, nargs='+',
+                            help="Worker counts to try (defaults to powers of two up to the CPU count).")
+        parser.add_argument('--interface', choices=('asgi', 'wsgi'), default='asgi')
+        parser.add_argument('--requests', type=int, default=200, help="Requests per run.")
+        parser.add_argument('--concurrency', type=int, help="Client threads (defaults to twice the workers).")
+        parser.add_argument('--steps', type=float, default=2e4, help="Step count of every solve.")
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'workers':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8}")
+        if options['url']:
+            concurrency = options['concurrency'] or 2 * (os.cpu_count() or 1)
+            self._report('-', self._run(options['url'], concurrency, options))
+            return
+
+        baseline = None
+        for n_workers in options['workers'] or self._default_counts():
+            concurrency = options['concurrency'] or 2 * n_workers
+            with _Server(n_workers, options['interface'], options['port']) as url:
+                result = self._run(url, concurrency, options)
+            baseline = baseline or result['throughput']
+            self._report(n_workers, result, result['throughput'] / baseline)
+
+    def _run(self, url, concurrency, options):
+        return benchmarks.load_test(url, options['requests'], concurrency, int(options['steps']))
+
+    def _report(self, n_workers, result, speedup=1.0):
+        self.stdout.write(
+            f"{n_workers:>7} {result['throughput']:9.1f} {result['p50'] * 1000:9.1f} "
+            f"{result['p95'] * 1000:9.1f} {speedup:7.2f}x"
+        )
+
+    @staticmethod
+    def _default_counts():
+        counts = [1]
+        while counts[-1] * 2 <= (os.cpu_count() or 1):
+            counts.append(counts[-1] * 2)
+        return counts
+
+
+class _Server:
+    """
+    A gunicorn server with the production settings, started for one run.
+    """
+
+    def __init__(self, n_workers, interface, port):
+        self.url = f'http://127.0.0.1:{port}'
+        self.env = {
+            **os.environ,
+            'WEB_CONCURRENCY': str(n_workers),
+            'SERVER_INTERFACE': interface,
+            'PORT': str(port),
+            'WEB_MAX_REQUESTS': '0',
+        }
+
+    def __enter__(self):
+        config = os.path.join(settings.BASE_DIR, 'docker', 'gunicorn.conf.py')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', config, '--access-logfile', ''],
+            cwd=settings.BASE_DIR, env=self.env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError("The server exited while starting, is gunicorn installed?")
+            try:
+                requests.get(f'{self.url}/api/differentialeq/cache-stats/', timeout=1)
+                return self.url
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        self.process.terminate()
+        raise CommandError("The server did not start within 30 seconds.")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
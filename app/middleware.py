@@ -0,0 +1,75 @@
+import json
+import logging
+import time
+
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+from app.profiling import SamplingProfiler
+from app.solvers import timing
+
+
+logger = logging.getLogger('app.timing')
+
+
+class TimingMiddleware:
+    """
+    Times every request by phase: SQL, sympify, lambdify, the stepping loop
+    and rendering, plus counters such as steps, evaluations of f and cache
+    hits. The result is sent in the `Server-Timing` header and logged as one
+    JSON line on the `app.timing` logger.
+
+    With SOLVER_PROFILING enabled, `?profile=1` runs the request under the
+    sampling profiler and returns the folded stacks instead of the response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = settings.SOLVER_PROFILING and request.GET.get('profile') == '1'
+        start = time.perf_counter()
+
+        with timing.collect() as timings, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self._time_query))
+            profiler = stack.enter_context(SamplingProfiler()) if profile else None
+            response = self.get_response(request)
+
+        timings.add('total', time.perf_counter() - start)
+        response['Server-Timing'] = self._server_timing(timings)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in timings.phases.items()},
+            'counters': timings.counters,
+        }))
+
+        if profiler is not None:
+            response = HttpResponse(profiler.folded(), content_type='text/plain; charset=utf-8')
+            response['Server-Timing'] = self._server_timing(timings)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook.
+        timings = timing.current()
+        if timings is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(lambda r: timings.add('render', time.perf_counter() - start))
+        return response
+
+    @staticmethod
+    def _time_query(execute, sql, params, many, context):
+        with timing.phase('sql'):
+            timing.count('sql_queries')
+            return execute(sql, params, many, context)
+
+    @staticmethod
+    def _server_timing(timings) -> str:
+        metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.phases.items()]
+        metrics.extend(f'{name};desc="{value}"' for name, value in timings.counters.items())
+        return ', '.join(metrics)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trajectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('func', models.CharField(max_length=100)),
+                ('x0', models.FloatField()),
+                ('y0', models.FloatField()),
+                ('b', models.FloatField()),
+                ('h', models.FloatField()),
+                ('method', models.CharField(max_length=20)),
+                ('x_vals', models.BinaryField()),
+                ('y_vals', models.BinaryField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('func', 'x0', 'y0', 'h', 'b', 'method'), name='unique_trajectory_params')],
+            },
+        ),
+    ]
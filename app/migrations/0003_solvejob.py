@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_trajectory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolveJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=20)),
+                ('func', models.CharField(max_length=100)),
+                ('x0', models.FloatField()),
+                ('y0', models.FloatField()),
+                ('b', models.FloatField()),
+                ('h', models.FloatField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('equation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='app.differentialeq')),
+            ],
+        ),
+    ]
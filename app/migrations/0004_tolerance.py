@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_solvejob'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='trajectory',
+            name='unique_trajectory_params',
+        ),
+        migrations.AddField(
+            model_name='differentialeq',
+            name='tol',
+            field=models.FloatField(default=1e-06),
+        ),
+        migrations.AddField(
+            model_name='solvejob',
+            name='tol',
+            field=models.FloatField(default=1e-06),
+        ),
+        migrations.AddField(
+            model_name='trajectory',
+            name='tol',
+            field=models.FloatField(default=1e-06),
+        ),
+        migrations.AddConstraint(
+            model_name='trajectory',
+            constraint=models.UniqueConstraint(fields=('func', 'x0', 'y0', 'h', 'b', 'tol', 'method'), name='unique_trajectory_solution'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_tolerance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='differentialeq',
+            index=models.Index(fields=['func', 'x0', 'y0', 'b', 'h'], name='equation_params_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solvejob',
+            index=models.Index(fields=['func', 'x0', 'y0', 'b', 'h', 'method', 'status'], name='solvejob_params_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='trajectory',
+            name='unique_trajectory_solution',
+        ),
+        migrations.AddField(
+            model_name='differentialeq',
+            name='initial_values',
+            field=models.CharField(blank=True, default='', max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='solvejob',
+            name='initial_values',
+            field=models.CharField(blank=True, default='', max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='trajectory',
+            name='initial_values',
+            field=models.CharField(blank=True, default='', max_length=1000),
+        ),
+        migrations.AlterField(
+            model_name='differentialeq',
+            name='func',
+            field=models.CharField(max_length=1000),
+        ),
+        migrations.AlterField(
+            model_name='solvejob',
+            name='func',
+            field=models.CharField(max_length=1000),
+        ),
+        migrations.AlterField(
+            model_name='trajectory',
+            name='func',
+            field=models.CharField(max_length=1000),
+        ),
+        migrations.AddConstraint(
+            model_name='trajectory',
+            constraint=models.UniqueConstraint(fields=('func', 'x0', 'y0', 'h', 'b', 'tol', 'initial_values', 'method'), name='unique_trajectory_solution'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_systems'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trajectory',
+            name='termination',
+            field=models.CharField(default='completed', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_trajectory_termination'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trajectory',
+            name='archive',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations
+
+from app import archive
+
+
+def drop_bdf2_trajectories(apps, schema_editor):
+    """
+    BDF2 used to restart with a backward Euler step between chunks, stored
+    long solutions are solved again on the next request.
+    """
+    Trajectory = apps.get_model('app', 'Trajectory')
+    trajectories = Trajectory.objects.filter(method='bdf2')
+    names = list(trajectories.exclude(archive='').values_list('archive', flat=True))
+    trajectories.delete()
+    archive.remove(settings.SOLVER_ARCHIVE_DIR, names)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_trajectory_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_bdf2_trajectories, migrations.RunPython.noop),
+    ]
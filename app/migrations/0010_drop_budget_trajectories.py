@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations
+
+from app import archive
+
+
+def drop_budget_trajectories(apps, schema_editor):
+    """
+    Results cut by the step limit are no longer stored, the limit is not
+    part of their key.
+    """
+    Trajectory = apps.get_model('app', 'Trajectory')
+    trajectories = Trajectory.objects.filter(termination='max_steps')
+    names = list(trajectories.exclude(archive='').values_list('archive', flat=True))
+    trajectories.delete()
+    archive.remove(settings.SOLVER_ARCHIVE_DIR, names)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_drop_restarted_bdf2'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_budget_trajectories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations
+
+from app import archive
+
+
+def drop_implicit_trajectories(apps, schema_editor):
+    """
+    Implicit steps whose Newton iteration did not converge used to be
+    accepted, stored solutions of the fixed-step implicit methods are solved
+    again on the next request.
+    """
+    Trajectory = apps.get_model('app', 'Trajectory')
+    trajectories = Trajectory.objects.filter(method__in=['backward_euler', 'trapezoidal', 'bdf2'])
+    names = list(trajectories.exclude(archive='').values_list('archive', flat=True))
+    trajectories.delete()
+    archive.remove(settings.SOLVER_ARCHIVE_DIR, names)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_drop_budget_trajectories'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_implicit_trajectories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations
+
+from app import archive
+
+
+def drop_adaptive_trajectories(apps, schema_editor):
+    """
+    Adaptive solutions used to be extended from shorter stored ones, which
+    gives other steps than a solve from x0. They are solved again on the
+    next request.
+    """
+    Trajectory = apps.get_model('app', 'Trajectory')
+    trajectories = Trajectory.objects.filter(method__in=['rk45', 'rosenbrock23', 'auto'])
+    names = list(trajectories.exclude(archive='').values_list('archive', flat=True))
+    trajectories.delete()
+    archive.remove(settings.SOLVER_ARCHIVE_DIR, names)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_drop_unconverged_implicit'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_adaptive_trajectories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_drop_extended_adaptive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solvejob',
+            name='worker',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -1,12 +1,14 @@
 from django.db import models
 
+from app.solvers.methods import DEFAULT_TOL
+
 # Create your models here.
 class DifferentialEq(models.Model):
     # Record name
     name = models.CharField(max_length=100, unique=True)
 
-    # Analitical expression of the function
-    func = models.CharField(max_length=100)
+    # Analitical expression of the function, or of a system ("y2; -y1")
+    func = models.CharField(max_length=1000)
 
     # Parameters
     x0 = models.FloatField()
@@ -14,7 +16,101 @@ class DifferentialEq(models.Model):
     b = models.FloatField()
     h = models.FloatField()
 
+    # Tolerance of adaptive methods
+    tol = models.FloatField(default=DEFAULT_TOL)
+
+    # Initial values of y1..yn separated by ';' for systems, y0 is y1(x0)
+    initial_values = models.CharField(max_length=1000, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Equations sharing the parameters of a stored solution
+            models.Index(fields=['func', 'x0', 'y0', 'b', 'h'], name='equation_params_idx'),
+        ]
+
     def __str__(self) -> str:
         return (f"Name: {self.name}, function: {self.func},\n"
                 f"condition: y({self.x0}) = {self.y0},\n"
                 f"boundaries: [{self.x0}, {self.b}], step: {self.h}")
+
+
+class Trajectory(models.Model):
+    """
+    Stored solution of an equation, so it is computed once and not on every GET.
+    """
+    # Parameters the solution was computed for
+    func = models.CharField(max_length=1000)
+    x0 = models.FloatField()
+    y0 = models.FloatField()
+    b = models.FloatField()
+    h = models.FloatField()
+    tol = models.FloatField(default=DEFAULT_TOL)
+    initial_values = models.CharField(max_length=1000, blank=True, default='')
+    method = models.CharField(max_length=20)
+
+    # Why the solve stopped, anything but 'completed' ends before b
+    termination = models.CharField(max_length=20, default='completed')
+
+    # Raw float64 buffers of the x grid and the solution (row-major for systems)
+    x_vals = models.BinaryField()
+    y_vals = models.BinaryField()
+
+    # Name of the .npy files of a long solution in the archive (see app.archive),
+    # its buffers above are empty then
+    archive = models.CharField(max_length=64, blank=True, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['func', 'x0', 'y0', 'h', 'b', 'tol', 'initial_values', 'method'],
+                name='unique_trajectory_solution',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return (f"{self.method} solution of {self.func}, "
+                f"y({self.x0}) = {self.y0}, [{self.x0}, {self.b}], step: {self.h}")
+
+
+class SolveJob(models.Model):
+    """
+    Background solve of an equation with one method.
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    equation = models.ForeignKey(DifferentialEq, on_delete=models.CASCADE, related_name='jobs')
+    method = models.CharField(max_length=20)
+
+    # Parameters of the equation when the job was submitted
+    func = models.CharField(max_length=1000)
+    x0 = models.FloatField()
+    y0 = models.FloatField()
+    b = models.FloatField()
+    h = models.FloatField()
+    tol = models.FloatField(default=DEFAULT_TOL)
+    initial_values = models.CharField(max_length=1000, blank=True, default='')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+
+    # Host and process id of the server process whose pool runs the job
+    worker = models.CharField(max_length=100, blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Pending and done jobs looked up when a solve is submitted
+            models.Index(fields=['func', 'x0', 'y0', 'b', 'h', 'method', 'status'], name='solvejob_params_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Job {self.pk}: {self.method} solve of {self.equation_id}, {self.status}"
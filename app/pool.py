@@ -0,0 +1,82 @@
+"""
+The local process pool that runs solves outside the request threads.
+
+Background jobs always use it. With SOLVER_OFFLOAD enabled (the default
+under ASGI) long synchronous solves are sent to it as well, so they do not
+hold the GIL of the server process while other requests are waiting.
+"""
+import multiprocessing
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from app.solvers import timing
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Lazily started worker pool shared by the process.
+
+    Workers are spawned rather than forked, so they do not inherit the
+    server's threads and database connections.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.SOLVER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def shutdown(wait: bool = True):
+    """
+    Stop the pool, letting running solves finish when wait is set.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def submit(fn, *args):
+    """
+    Submit fn(*args) to the pool, restarting it once if it is broken.
+    """
+    try:
+        return get_executor().submit(fn, *args)
+    except BrokenProcessPool:
+        reset_executor()
+        return get_executor().submit(fn, *args)
+
+
+def call(fn, *args, n_steps: int = 0):
+    """
+    Return fn(*args), run in the pool when offloading is enabled and the
+    solve has at least SOLVER_OFFLOAD_MIN_STEPS steps. Shorter solves run
+    inline, where they are cheaper than the round trip to a worker.
+    """
+    if not settings.SOLVER_OFFLOAD or n_steps < settings.SOLVER_OFFLOAD_MIN_STEPS:
+        return fn(*args)
+    timing.count('offloaded')
+    with timing.phase('solve'):
+        try:
+            return submit(fn, *args).result()
+        except BrokenProcessPool:
+            reset_executor()
+            raise
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+
+from app.models import DifferentialEq
+from app.store import invalidate, params_of
+
+
+@receiver(pre_save, sender=DifferentialEq)
+def invalidate_updated_solutions(sender, instance, **kwargs):
+    """
+    Drop stored solutions of the old parameters when an equation is edited,
+    keeping those the new parameters can build on.
+    """
+    if instance.pk is None:
+        return
+    old = DifferentialEq.objects.filter(pk=instance.pk).first()
+    if old is None or params_of(old) == params_of(instance):
+        return
+    invalidate(**params_of(old), exclude_pk=instance.pk, keep_for=params_of(instance))
+
+
+@receiver(post_delete, sender=DifferentialEq)
+def invalidate_deleted_solutions(sender, instance, **kwargs):
+    """
+    Drop stored solutions of a deleted equation.
+    """
+    invalidate(**params_of(instance), exclude_pk=instance.pk)
@@ -0,0 +1,174 @@
+"""
+Comparison of methods and estimates of their error.
+
+All methods share one compiled right-hand side and are evaluated on the
+same grid, so their difference curves line up point by point.
+"""
+from functools import lru_cache
+
+import numpy as np
+import sympy as sp
+
+from app.solvers.compiler import get_compiled, x, y
+from app.solvers.engine import COMPLETED, make_grid, solve
+from app.solvers.methods import DEFAULT_TOL, METHODS
+
+
+# dsolve hints that either give an explicit solution quickly or fail.
+CLOSED_FORM_HINTS = (
+    '1st_linear',
+    'Bernoulli',
+    'separable',
+    '1st_exact',
+    'nth_linear_constant_coeff_undetermined_coefficients',
+)
+
+
+@lru_cache(maxsize=128)
+def closed_form(expr: sp.Expr, x0: float, y0: float) -> sp.Expr | None:
+    """
+    Explicit solution of y' = expr, y(x0) = y0 found by sympy's dsolve, or
+    None when there is none in closed form.
+    """
+    Y = sp.Function('y')
+    ode = sp.Eq(Y(x).diff(x), expr.subs(y, Y(x)))
+    ics = {Y(sp.nsimplify(x0, rational=True)): sp.nsimplify(y0, rational=True)}
+    try:
+        hints = sp.classify_ode(ode, Y(x))
+    except (NotImplementedError, ValueError, TypeError):
+        return None
+    for hint in CLOSED_FORM_HINTS:
+        if hint not in hints:
+            continue
+        try:
+            solution = sp.dsolve(ode, Y(x), hint=hint, ics=ics)
+        except (NotImplementedError, ValueError, TypeError, ZeroDivisionError):
+            continue
+        if isinstance(solution, sp.Eq) and solution.lhs == Y(x) \
+                and not solution.rhs.has(sp.Integral) and solution.rhs.free_symbols <= {x}:
+            return solution.rhs
+    return None
+
+
+def exact_values(expr: sp.Expr, x0: float, y0: float, x_range: np.ndarray) -> np.ndarray | None:
+    """
+    The closed-form solution on the grid, or None when there is no real one.
+    """
+    solution = closed_form(expr, x0, y0)
+    if solution is None:
+        return None
+    with np.errstate(all='ignore'):
+        values = np.asarray(sp.lambdify(x, solution, "numpy")(x_range))
+    if np.iscomplexobj(values):
+        return None
+    return np.broadcast_to(values.astype(float), x_range.shape).copy()
+
+
+def richardson_estimate(func, method: str, x0: float, y0: float, h: float, b: float, y_vals: np.ndarray,
+                        coarse: np.ndarray | None = None, stats: dict | None = None, **limits) -> np.ndarray:
+    """
+    Error of a fixed-step solution from its solution with step 2h.
+
+    With a method of order p, y_2h - y_h = (2^p - 1) C h^p, which gives the
+    leading error term C h^p of y_h at every other point of the h grid, the
+    points in between take the mean of their neighbours. If either solution
+    stops early, the estimate covers fewer points.
+
+    A stored `coarse` solution, e.g. from before h was halved, saves the
+    second solve and gives the same values. Otherwise the second solve
+    stores its termination in `stats`.
+    """
+    order = METHODS[method].order
+    if coarse is None:
+        _, coarse = solve(func, method, x0, y0, 2 * h, b, stats=stats, **limits)
+    n_common = min(len(coarse), (len(y_vals) + 1) // 2)
+    even = (coarse[:n_common] - y_vals[:2 * n_common:2]) / (2 ** order - 1)
+    estimate = np.empty((max(2 * n_common - 1, 0), *even.shape[1:]))
+    estimate[::2] = even
+    estimate[1::2] = (even[:-1] + even[1:]) / 2
+    return estimate
+
+
+def norms(values: np.ndarray) -> dict:
+    """
+    Maximum absolute and root mean square value, None when not finite.
+    """
+    finite = np.isfinite(values).all() and len(values)
+    return {
+        'max': float(np.max(np.abs(values))) if finite else None,
+        'rms': float(np.sqrt(np.mean(values ** 2))) if finite else None,
+    }
+
+
+def compare_methods(func: str, methods: list[str], x0: float, y0: float, h: float, b: float,
+                    tol: float = DEFAULT_TOL, reference: str = 'richardson', max_steps: int | None = None,
+                    deadline: float | None = None, coarse: dict | None = None) -> dict:
+    """
+    Solve with every method and compare them.
+
+    The reference is the closed-form solution with reference='exact' (a
+    ValueError if there is none) and otherwise the solution of the highest
+    order fixed-step method. Every method gets its difference from the
+    reference and, for fixed-step methods, a Richardson estimate of its own
+    error from their solution with step 2h, taken from `coarse` (by method)
+    when it is stored. Why that solve stopped is the 'estimate_termination'. Fixed-step methods share the grid of h, adaptive methods are
+    compared at their own points and return them as 'x'. Systems are
+    compared column by column, against fixed-step methods only.
+
+    Every solve runs within max_steps and the deadline. Methods that stop
+    early (see engine.solve) have shorter curves, compared with the
+    reference where both exist, and report their 'termination'.
+    """
+    compiled = get_compiled(func)
+    if compiled.is_system and reference == 'exact':
+        raise ValueError("Closed-form solutions are only found for single equations.")
+    x_range = make_grid(x0, h, b)
+    limits = {'max_steps': max_steps, 'deadline': deadline}
+    solutions, terminations = {}, {}
+    for method in methods:
+        stats = {}
+        solutions[method] = solve(compiled, method, x0, y0, h, b, tol, stats, **limits)
+        terminations[method] = stats['termination']
+
+    exact = None
+    if reference == 'exact':
+        exact = exact_values(compiled.expr, x0, y0, x_range)
+        if exact is None:
+            raise ValueError("The equation has no closed-form solution.")
+        reference_name = 'exact'
+    else:
+        fixed = [method for method in methods if not METHODS[method].adaptive] or methods
+        reference_name = max(fixed, key=lambda method: METHODS[method].order)
+    x_ref, y_ref = (x_range, exact) if exact is not None else solutions[reference_name]
+
+    results = {}
+    with np.errstate(all='ignore'):
+        for method, (x_vals, y_vals) in solutions.items():
+            if METHODS[method].adaptive:
+                y_at = exact_values(compiled.expr, x0, y0, x_vals) if exact is not None else np.interp(x_vals, x_ref, y_ref)
+                difference = y_vals - y_at
+                results[method] = {
+                    'x': x_vals,
+                    'y': y_vals,
+                    'termination': terminations[method],
+                    'difference': difference,
+                    'deviation': norms(difference),
+                }
+                continue
+            # The reference is a fixed-step method or exact here, on the same grid.
+            n_common = min(len(y_vals), len(y_ref))
+            difference = y_vals[:n_common] - y_ref[:n_common]
+            estimate_stats = {'termination': COMPLETED}
+            estimate = richardson_estimate(compiled, method, x0, y0, h, b, y_vals, (coarse or {}).get(method),
+                                           estimate_stats, **limits)
+            results[method] = {
+                'y': y_vals,
+                'termination': terminations[method],
+                'estimate_termination': estimate_stats['termination'],
+                'difference': difference,
+                'deviation': norms(difference),
+                'error_estimate': estimate,
+                'estimated_error': norms(estimate),
+            }
+
+    return {'x': x_range, 'reference': reference_name, 'exact': exact, 'methods': results}
@@ -0,0 +1,274 @@
+import os
+import re
+import threading
+
+from collections import OrderedDict
+
+import numpy as np
+import sympy as sp
+
+from sympy.core.function import AppliedUndef
+
+from app.solvers import timing
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+x, y = sp.symbols('x y')
+
+# State variables of systems are named y1, y2, ...
+SYSTEM_VARIABLE = re.compile(r'y\d+$')
+
+
+def _sympify(text: str) -> sp.Expr:
+    """
+    sympify that only accepts expressions of known functions, not lists,
+    relations or booleans.
+    """
+    expr = sp.sympify(text)
+    if not isinstance(expr, sp.Expr):
+        raise sp.SympifyError(text)
+    undefined = expr.atoms(AppliedUndef)
+    if undefined:
+        names = ', '.join(sorted(str(function.func) for function in undefined))
+        raise ValueError(f"Unknown functions {names}.")
+    return expr
+
+
+def _unknown_variables(exprs, allowed) -> str:
+    """
+    Names of the free symbols of the expressions that are not allowed, or ''.
+    """
+    unknown = set().union(*(expr.free_symbols for expr in exprs)) - set(allowed)
+    return ', '.join(sorted(str(symbol) for symbol in unknown))
+
+
+class CompiledExpression:
+    """
+    Right-hand side f(x, y) parsed once and compiled for every evaluation mode.
+
+    `scalar` is generated Python source built on the `math` module and works
+    on plain floats, `vector` is the numpy version used as a fallback and for
+    array arguments.
+    """
+    is_system = False
+
+    def __init__(self, expr: sp.Expr):
+        unknown = _unknown_variables((expr,), (x, y))
+        if unknown:
+            raise ValueError(f"Unknown variables {unknown}, an equation may use x and y.")
+        self.expr = expr
+        self.scalar = sp.lambdify((x, y), expr, "math")
+        self.vector = sp.lambdify((x, y), expr, "numpy")
+        self._jitted = None
+        self._jit_failed = False
+        self._derivatives = {}
+
+    def derivatives(self, module: str = "math"):
+        """
+        Function returning (df/dy, df/dx) for the implicit methods, derived
+        with sympy and compiled for the module ("math" or "numpy") on first
+        use.
+        """
+        if module not in self._derivatives:
+            partials = (sp.diff(self.expr, y), sp.diff(self.expr, x))
+            self._derivatives[module] = sp.lambdify((x, y), partials, module)
+        return self._derivatives[module]
+
+    def jitted(self):
+        """
+        Return the numba-compiled scalar function, or None when numba is not
+        installed or cannot compile the expression.
+        """
+        if numba is None or self._jit_failed:
+            return None
+        if self._jitted is None:
+            try:
+                f = numba.njit(error_model='numpy')(self.scalar)
+                f(0.0, 0.0)
+            except Exception:
+                self._jit_failed = True
+                return None
+            self._jitted = f
+        return self._jitted
+
+
+class CompiledSystem:
+    """
+    Right-hand sides of a system y' = F(x, y1..yn), compiled once into a
+    single numpy function that returns all n derivatives as one array.
+    """
+    is_system = True
+
+    def __init__(self, exprs: tuple):
+        self.expr = exprs
+        self.n_vars = len(exprs)
+        variables = sp.symbols(f'y1:{self.n_vars + 1}')
+        unknown = _unknown_variables(exprs, (x, *variables))
+        if unknown:
+            raise ValueError(f"Unknown variables {unknown}, a system of {self.n_vars} may use x and y1..y{self.n_vars}.")
+        f = sp.lambdify((x, variables), list(exprs), "numpy", cse=True)
+
+        def vector(x_val, y_vec):
+            return np.array(f(x_val, y_vec), dtype=float)
+
+        self.vector = vector
+        self._variables = variables
+        self._derivatives = None
+
+    def derivatives(self, module: str = "numpy"):
+        """
+        Function returning the Jacobian matrix dF/dy and the vector dF/dx,
+        derived with sympy and compiled on first use. Systems always use
+        numpy.
+        """
+        if self._derivatives is None:
+            rhs = sp.Matrix(self.expr)
+            partials = sp.lambdify(
+                (x, self._variables), (rhs.jacobian(self._variables), rhs.diff(x)), "numpy", cse=True,
+            )
+
+            def derivatives(x_val, y_vec):
+                jacobian, dfdx = partials(x_val, y_vec)
+                return (np.array(jacobian, dtype=float), np.array(dfdx, dtype=float).reshape(-1))
+
+            self._derivatives = derivatives
+        return self._derivatives
+
+    def jitted(self):
+        return None
+
+
+def parse(func: str) -> sp.Expr | tuple:
+    """
+    Parse a function string. Several right-hand sides separated by ';' or
+    one using y1, y2, ... describe a system and give a tuple of expressions.
+    """
+    exprs = tuple(_sympify(part) for part in func.split(';'))
+    if len(exprs) > 1 or any(SYSTEM_VARIABLE.match(s.name) for s in exprs[0].free_symbols):
+        return exprs
+    return exprs[0]
+
+
+def compile_parsed(expr: sp.Expr | tuple) -> CompiledExpression | CompiledSystem:
+    return CompiledSystem(expr) if isinstance(expr, tuple) else CompiledExpression(expr)
+
+
+def compile_expression(func: str) -> CompiledExpression | CompiledSystem:
+    """
+    Parse the function string and compile it, bypassing the cache.
+    """
+    return compile_parsed(parse(func))
+
+
+def compile_event(event: str, n_vars: int = 0):
+    """
+    Compile an event function g(x, y), or g(x, y1..yn) for a system of
+    n_vars, to a numpy function evaluated on whole arrays of points (one row
+    per variable for systems). Raises ValueError for unknown variables.
+    """
+    expr = _sympify(event)
+    variables = sp.symbols(f'y1:{n_vars + 1}') if n_vars else y
+    unknown = _unknown_variables((expr,), (x, *(variables if n_vars else (y,))))
+    if unknown:
+        raise ValueError(f"Unknown variables {unknown} in event '{event}'.")
+    return sp.lambdify((x, variables), expr, "numpy")
+
+
+class ExpressionCache:
+    """
+    Bounded LRU cache of compiled right-hand sides shared by the whole process.
+
+    Entries are keyed by the canonical sympy form (`srepr` of the parsed
+    expression), so "x + y" and "y+x" share one compiled function. Raw
+    strings are remembered as aliases of their canonical key, which lets
+    repeated lookups skip parsing altogether.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._aliases = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, func: str) -> CompiledExpression | CompiledSystem:
+        """
+        Return the compiled expression for the function string.
+
+        Raises the sympify errors for invalid expressions and ValueError for
+        unknown variables or functions.
+        """
+        with self._lock:
+            key = self._aliases.get(func)
+            if key is not None and key in self._entries:
+                return self._hit(func, key)
+
+        with timing.phase('sympify'):
+            expr = parse(func)
+            key = sp.srepr(expr)
+
+        with self._lock:
+            self._remember_alias(func, key)
+            if key in self._entries:
+                return self._hit(func, key)
+            self.misses += 1
+        timing.count('expr_cache_misses')
+
+        with timing.phase('lambdify'):
+            compiled = compile_parsed(expr)
+
+        with self._lock:
+            compiled = self._entries.setdefault(key, compiled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return compiled
+
+    def _hit(self, func, key):
+        self.hits += 1
+        timing.count('expr_cache_hits')
+        self._aliases.move_to_end(func)
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def _remember_alias(self, func, key):
+        self._aliases[func] = key
+        self._aliases.move_to_end(func)
+        while len(self._aliases) > 4 * self.maxsize:
+            self._aliases.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Counters for sizing the cache.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+expression_cache = ExpressionCache(int(os.getenv("SOLVER_EXPR_CACHE_SIZE", 256)))
+
+
+def get_compiled(func: str) -> CompiledExpression | CompiledSystem:
+    """
+    Compiled expression for the function string from the shared cache.
+    """
+    return expression_cache.get(func)
@@ -0,0 +1,101 @@
+"""
+Shape-preserving reduction of trajectories for plotting.
+
+The solve runs at full resolution, only the returned points are reduced.
+"""
+import numpy as np
+
+
+def window(x_vals: np.ndarray, y_vals: np.ndarray, x_min: float | None = None, x_max: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Points with x_min <= x <= x_max of a trajectory with increasing x.
+    """
+    start = 0 if x_min is None else np.searchsorted(x_vals, x_min, side='left')
+    stop = len(x_vals) if x_max is None else np.searchsorted(x_vals, x_max, side='right')
+    return (x_vals[start:stop], y_vals[start:stop])
+
+
+def minmax(x_vals: np.ndarray, y_vals: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Keep the first and last points and the minimum and maximum of each of
+    (max_points - 2) / 2 equal buckets, which preserves spikes exactly.
+    """
+    n = len(x_vals)
+    if n <= max_points:
+        return (x_vals, y_vals)
+
+    n_buckets = max(1, (max_points - 2) // 2)
+    size = -(-n // n_buckets)
+    padded = np.concatenate([y_vals, np.full(-n % size, y_vals[-1])]).reshape(-1, size)
+    offsets = np.arange(padded.shape[0]) * size
+    indices = np.concatenate([
+        [0, n - 1],
+        padded.argmin(axis=1) + offsets,
+        padded.argmax(axis=1) + offsets,
+    ])
+    indices = np.unique(np.minimum(indices, n - 1))
+    return (x_vals[indices], y_vals[indices])
+
+
+def lttb(x_vals: np.ndarray, y_vals: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last points and from
+    each bucket the point forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+    """
+    n = len(x_vals)
+    if n <= max_points or max_points < 3:
+        return (x_vals, y_vals)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    indices = np.empty(max_points, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(max_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x_vals[stop:next_stop].mean() if next_stop > stop else x_vals[-1]
+        next_y = y_vals[stop:next_stop].mean() if next_stop > stop else y_vals[-1]
+
+        bucket_x, bucket_y = x_vals[start:stop], y_vals[start:stop]
+        areas = np.abs(
+            (x_vals[prev] - next_x) * (bucket_y - y_vals[prev])
+            - (x_vals[prev] - bucket_x) * (next_y - y_vals[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        indices[i + 1] = prev
+    return (x_vals[indices], y_vals[indices])
+
+
+DECIMATORS = {
+    'minmax': minmax,
+    'lttb': lttb,
+}
+
+
+def stride(x_vals: np.ndarray, y_vals: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Keep max_points evenly spaced points including the first and last.
+    """
+    n = len(x_vals)
+    if n <= max_points:
+        return (x_vals, y_vals)
+    indices = np.linspace(0, n - 1, max_points).astype(int)
+    return (x_vals[indices], y_vals[indices])
+
+
+def reduce(x_vals: np.ndarray, y_vals: np.ndarray, max_points: int | None = None, method: str = 'minmax',
+           x_min: float | None = None, x_max: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Restrict a trajectory to the x window and decimate it to max_points.
+
+    Trajectories of systems (one column per variable) are sampled at evenly
+    spaced rows, so all variables keep the same x values.
+    """
+    if x_min is not None or x_max is not None:
+        x_vals, y_vals = window(x_vals, y_vals, x_min, x_max)
+    if max_points is not None:
+        decimate = stride if y_vals.ndim > 1 else DECIMATORS[method]
+        x_vals, y_vals = decimate(x_vals, y_vals, max_points)
+    return (x_vals, y_vals)
@@ -0,0 +1,584 @@
+import time
+
+from collections.abc import Iterator
+
+import numpy as np
+
+from app.solvers import timing
+from app.solvers.compiler import CompiledExpression, CompiledSystem, compile_event, get_compiled, numba
+from app.solvers.methods import DEFAULT_TOL, METHODS
+
+
+# Below this many steps the numba compile time is not paid back.
+JIT_MIN_STEPS = 50_000
+
+# Errors the `math` based function raises where numpy returns inf/nan.
+SCALAR_ERRORS = (ArithmeticError, ValueError, TypeError, NameError)
+
+# Upper bound on the steps of adaptive methods, accepted or rejected.
+MAX_ADAPTIVE_STEPS = 10_000_000
+
+# Why stepping stopped, reported as stats['termination'].
+COMPLETED = 'completed'
+DIVERGED = 'diverged'
+STALLED = 'stalled'
+EVENT = 'event'
+MAX_STEPS = 'max_steps'
+MAX_TIME = 'max_time'
+
+# Stops by the budget of a request, which depend on the settings and the load
+# rather than the equation, so such results are neither stored nor cached.
+BUDGET_TERMINATIONS = (MAX_STEPS, MAX_TIME)
+
+# Values beyond this count as diverged, like inf and nan.
+DIVERGENCE_LIMIT = 1e100
+
+# Steps between checks for divergence, events and the deadline.
+CHECK_STEPS = 100_000
+
+_jitted_kernels = {}
+
+
+def count_steps(x0: float, h: float, b: float) -> int:
+    """
+    Number of grid points covering [x0, b] with step h.
+    """
+    return int(np.ceil((b - x0) / h)) + 1
+
+
+def make_grid(x0: float, h: float, b: float) -> np.ndarray:
+    """
+    Build the x grid covering [x0, b] with step h.
+    """
+    n_steps = count_steps(x0, h, b)
+    return np.linspace(x0, x0 + h * (n_steps - 1), n_steps)
+
+
+def grid_slice(x0: float, h: float, n_steps: int, start: int, stop: int) -> np.ndarray:
+    """
+    Points start..stop-1 of the grid, equal to the same slice of make_grid
+    but without building the whole grid.
+    """
+    end = x0 + h * (n_steps - 1)
+    if n_steps == 1:
+        return np.array([x0], dtype=float)[start:stop]
+    step = (end - x0) / (n_steps - 1)
+    x_range = np.arange(start, stop) * step + x0
+    if stop == n_steps:
+        x_range[-1] = end
+    return x_range
+
+
+def _jitted_kernel(method: str):
+    if method not in _jitted_kernels:
+        _jitted_kernels[method] = numba.njit(error_model='numpy')(METHODS[method].kernel)
+    return _jitted_kernels[method]
+
+
+def _run_jitted(method, compiled, *args) -> tuple[bool, object]:
+    """
+    Run the JIT-compiled kernel, returning (False, None) if it cannot be used.
+    """
+    f = compiled.jitted()
+    if f is None:
+        return (False, None)
+    try:
+        return (True, _jitted_kernel(method)(f, *args))
+    except Exception:
+        return (False, None)
+
+
+def _compiled(func):
+    return func if isinstance(func, (CompiledExpression, CompiledSystem)) else get_compiled(func)
+
+
+def _get_method(method: str):
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'.")
+    return METHODS[method]
+
+
+def _check_system(compiled, spec):
+    if compiled.is_system and spec.adaptive:
+        raise ValueError(f"Method '{spec.name}' does not support systems.")
+
+
+def _check_prefix(spec, prefix):
+    if prefix is not None and spec.adaptive:
+        raise ValueError(f"Method '{spec.name}' cannot extend a prefix.")
+
+
+def check_method(func: str | CompiledExpression | CompiledSystem, method: str, events=()):
+    """
+    Raise ValueError if the method cannot solve the equation or the events
+    use unknown variables.
+    """
+    _check_system(_compiled(func), _get_method(method))
+    _Guard(_compiled(func), events)
+
+
+def _newton(compiled: CompiledExpression | CompiledSystem, module: str):
+    """
+    The Newton correction of implicit kernels, solving (1 - c df/dy) d = r
+    with the compiled Jacobian. The numpy version also works column-wise on
+    batches.
+    """
+    derivatives = compiled.derivatives(module)
+    if compiled.is_system:
+        identity = np.eye(compiled.n_vars)
+
+        def newton(x, y, c, r):
+            d = np.linalg.solve(identity - c * derivatives(x, y)[0], r)
+            return (d, np.max(np.abs(d) / (1 + np.abs(y))))
+    elif module == "math":
+        def newton(x, y, c, r):
+            d = r / (1 - c * derivatives(x, y)[0])
+            return (d, abs(d) / (1 + abs(y)))
+    else:
+        def newton(x, y, c, r):
+            d = r / (1 - c * derivatives(x, y)[0])
+            return (d, np.max(np.abs(d) / (1 + np.abs(y))))
+    return newton
+
+
+def _functions(compiled: CompiledExpression | CompiledSystem, spec, module: str) -> tuple:
+    """
+    The functions a kernel takes before its other arguments: f, and for
+    implicit methods the Newton correction or the partial derivatives.
+    """
+    f = compiled.scalar if module == "math" else compiled.vector
+    if not spec.implicit:
+        return (f,)
+    if spec.adaptive:
+        return (f, compiled.derivatives(module))
+    return (f, _newton(compiled, module))
+
+
+def _integrate_system(compiled: CompiledSystem, method: str, x_range: np.ndarray, y0, h: float,
+                      y_prev=None) -> np.ndarray:
+    """
+    Run a fixed-step method on a system, the state is a vector and the
+    result has one row per grid point and one column per variable.
+    """
+    spec = METHODS[method]
+    y_vals = np.empty((len(x_range), compiled.n_vars))
+    history = () if y_prev is None else (np.asarray(y_prev, dtype=float),)
+    with np.errstate(all='ignore'):
+        spec.kernel(*_functions(compiled, spec, "numpy"), x_range, np.asarray(y0, dtype=float), np.float64(h), y_vals,
+                    *history)
+    return y_vals
+
+
+def _integrate(compiled: CompiledExpression, method: str, x_range: np.ndarray, y0: float, h: float, use_jit: bool,
+               y_prev=None) -> np.ndarray:
+    """
+    Run a fixed-step method over a ready grid and return the y values.
+    `y_prev` continues a multistep method (see Method).
+    """
+    if compiled.is_system:
+        return _integrate_system(compiled, method, x_range, y0, h, y_prev)
+    spec = METHODS[method]
+    if use_jit and numba is not None and not spec.implicit:
+        y_vals = np.empty(len(x_range))
+        done, _ = _run_jitted(method, compiled, x_range, float(y0), float(h), y_vals)
+        if done:
+            return y_vals
+
+    try:
+        y_list = [0.0] * len(x_range)
+        history = () if y_prev is None else (float(y_prev),)
+        spec.kernel(*_functions(compiled, spec, "math"), x_range.tolist(), float(y0), float(h), y_list, *history)
+        return np.array(y_list, dtype=float)
+    except SCALAR_ERRORS:
+        pass
+
+    y_vals = np.zeros(len(x_range))
+    history = () if y_prev is None else (np.float64(y_prev),)
+    with np.errstate(all='ignore'):
+        spec.kernel(*_functions(compiled, spec, "numpy"), x_range, np.float64(y0), np.float64(h), y_vals, *history)
+    return y_vals
+
+
+def _integrate_adaptive(compiled: CompiledExpression, method: str, x0: float, y0: float, h: float, b: float,
+                        tol: float, use_jit: bool, max_steps: int = MAX_ADAPTIVE_STEPS) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Run an adaptive method and return the x and y values it chose and the
+    number of evaluations of f.
+    """
+    spec = METHODS[method]
+    args = (float(x0), float(y0), float(h), float(b), float(tol), int(max_steps))
+    use_jit = use_jit and numba is not None and not spec.implicit
+    done, result = _run_jitted(method, compiled, *args) if use_jit else (False, None)
+
+    if not done:
+        try:
+            result = spec.kernel(*_functions(compiled, spec, "math"), *args)
+        except SCALAR_ERRORS:
+            with np.errstate(all='ignore'):
+                result = spec.kernel(*_functions(compiled, spec, "numpy"), *(np.float64(arg) for arg in args[:5]),
+                                     int(max_steps))
+
+    x_vals, y_vals, evaluations = result
+    return (np.array(x_vals, dtype=float), np.array(y_vals, dtype=float), int(evaluations))
+
+
+class _Guard:
+    """
+    Checks each solved chunk for diverged values, events and the deadline,
+    so stepping stops early instead of running to b on inf/nan.
+    """
+
+    def __init__(self, compiled: CompiledExpression | CompiledSystem, events=(), deadline: float | None = None):
+        n_vars = compiled.n_vars if compiled.is_system else 0
+        self.events = [compile_event(event, n_vars) for event in events]
+        self.deadline = deadline
+        self._last_values = None
+
+    def check(self, x_vals: np.ndarray, y_vals: np.ndarray) -> tuple[int, str | None]:
+        """
+        Return how many points of the chunk to keep and why stepping stops,
+        or None as the reason to go on.
+        """
+        diverged = ~np.isfinite(y_vals) | (np.abs(y_vals) > DIVERGENCE_LIMIT)
+        if diverged.ndim > 1:
+            diverged = diverged.any(axis=1)
+        n_keep, reason = len(x_vals), None
+        if diverged.any():
+            n_keep, reason = int(np.argmax(diverged)), DIVERGED
+        if self.events and n_keep:
+            crossing = self._crossing(x_vals[:n_keep], y_vals[:n_keep])
+            if crossing is not None:
+                n_keep, reason = crossing + 1, EVENT
+        if reason is None and self.deadline is not None and time.time() > self.deadline:
+            reason = MAX_TIME
+        return (n_keep, reason)
+
+    def _crossing(self, x_vals, y_vals) -> int | None:
+        """
+        Index of the first point where an event function changes its sign
+        or reaches zero, continuing from the last point of the previous chunk.
+        """
+        args = y_vals.T if y_vals.ndim > 1 else y_vals
+        with np.errstate(all='ignore'):
+            values = np.array([np.broadcast_to(g(x_vals, args), x_vals.shape) for g in self.events], dtype=float)
+        previous = self._last_values
+        self._last_values = values[:, -1]
+        if previous is not None:
+            values = np.column_stack((previous, values))
+        signs = np.sign(values)
+        changed = (signs[:, 1:] * signs[:, :-1] < 0) | ((signs[:, 1:] == 0) & (signs[:, :-1] != 0))
+        indices = np.flatnonzero(changed.any(axis=0))
+        if not len(indices):
+            return None
+        return int(indices[0]) + (0 if previous is not None else 1)
+
+
+def _fixed_chunks(compiled, method: str, x0: float, y0, h: float, n_steps: int, chunk_size: int,
+                  use_jit: bool, start: int = 0, y_prev=None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Run a fixed-step method over the first n_steps points of the grid, one
+    chunk at a time. With `start`, y0 is the value at point start - 1 and
+    the chunks begin at point start, multistep methods also take the value
+    at start - 2 as y_prev. The chunking does not change the values.
+    """
+    multistep = METHODS[method].multistep
+    y_last = y0
+    for start in range(start, n_steps, chunk_size):
+        stop = min(start + chunk_size, n_steps)
+        if start == 0:
+            x_range = grid_slice(x0, h, n_steps, start, stop)
+            y_vals = _integrate(compiled, method, x_range, y0, h, use_jit)
+        else:
+            # Start one point back, at the last value of the previous chunk.
+            x_range = grid_slice(x0, h, n_steps, start - 1, stop)
+            y_vals = _integrate(compiled, method, x_range, y_last, h, use_jit, y_prev if multistep else None)
+            x_range, y_vals = x_range[1:], y_vals[1:]
+        if multistep:
+            y_prev = y_vals[-2] if len(y_vals) > 1 else (y_last if start > 0 else None)
+        y_last = y_vals[-1]
+        yield (x_range, y_vals)
+
+
+def _guarded_fixed(compiled, method: str, x0: float, y0, h: float, b: float, chunk_size: int, guard: _Guard,
+                   max_steps: int | None, result: dict, start: int = 0,
+                   y_prev=None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Fixed-step chunks cut at the first point the guard rejects, stopping
+    after at most max_steps steps. The reason is stored in result['termination'].
+    """
+    n_steps = count_steps(x0, h, b)
+    result['termination'] = COMPLETED
+    first = max(start - 1, 0)
+    if max_steps is not None and n_steps - 1 - first > max_steps:
+        n_steps = first + max_steps + 1
+        result['termination'] = MAX_STEPS
+
+    for x_range, y_vals in _fixed_chunks(compiled, method, x0, y0, h, n_steps, chunk_size,
+                                         n_steps - first >= JIT_MIN_STEPS, start, y_prev):
+        n_keep, reason = guard.check(x_range, y_vals)
+        if n_keep:
+            yield (x_range[:n_keep], y_vals[:n_keep])
+        if reason is not None:
+            result['termination'] = reason
+            return
+
+
+def _adaptive_rounds(compiled, method: str, x0: float, y0: float, h: float, b: float, tol: float, guard: _Guard,
+                     max_steps: int | None, result: dict) -> Iterator[tuple[np.ndarray, np.ndarray, int]]:
+    """
+    Run an adaptive method in rounds of at most CHECK_STEPS steps, each
+    restarting from the last accepted point with the last step size, and
+    check every round with the guard. Yields the new points of every round
+    with its evaluations of f, the reason it stops is stored in
+    result['termination'].
+    """
+    limit = MAX_ADAPTIVE_STEPS if max_steps is None else min(max_steps, MAX_ADAPTIVE_STEPS)
+    use_jit = count_steps(x0, h, b) >= JIT_MIN_STEPS
+    taken = 0
+    x, y = x0, y0
+    while True:
+        n_round = min(CHECK_STEPS, limit - taken)
+        x_vals, y_vals, n_evaluations = _integrate_adaptive(compiled, method, x, y, h, b, tol, use_jit, n_round)
+
+        # Later rounds start at the last point of the previous one.
+        start = 1 if taken else 0
+        taken += n_round
+        n_keep, reason = guard.check(x_vals[start:], y_vals[start:])
+        yield (x_vals[start:start + n_keep], y_vals[start:start + n_keep], n_evaluations)
+        if reason is None:
+            if x_vals[-1] >= b:
+                reason = COMPLETED
+            elif taken >= limit:
+                reason = MAX_STEPS
+            elif len(x_vals) < 2:
+                # Steps shrank below the minimum without getting anywhere.
+                reason = STALLED
+        if reason is not None:
+            result['termination'] = reason
+            return
+        x, y, h = x_vals[-1], y_vals[-1], x_vals[-1] - x_vals[-2]
+
+
+def _guarded_adaptive(compiled, method: str, x0: float, y0: float, h: float, b: float, tol: float, guard: _Guard,
+                      max_steps: int | None, result: dict) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    All rounds of _adaptive_rounds as one trajectory and the evaluations of f.
+    """
+    rounds = list(_adaptive_rounds(compiled, method, x0, y0, h, b, tol, guard, max_steps, result))
+    x_range = np.concatenate([r[0] for r in rounds]) if len(rounds) > 1 else rounds[0][0]
+    y_vals = np.concatenate([r[1] for r in rounds]) if len(rounds) > 1 else rounds[0][1]
+    return (x_range, y_vals, sum(r[2] for r in rounds))
+
+
+def solve(func: str | CompiledExpression | CompiledSystem, method: str, x0: float, y0, h: float, b: float,
+          tol: float = DEFAULT_TOL, stats: dict | None = None, events=(), max_steps: int | None = None,
+          deadline: float | None = None, prefix: tuple[np.ndarray, np.ndarray] | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Solve y' = f(x, y), y(x0) = y0 on [x0, b] with the given method.
+
+    The expression comes from the shared compiled-expression cache and the
+    stepping loop runs on plain floats (or JIT-compiled when numba is
+    available). If the scalar version hits a math domain error, the solve is
+    repeated with numpy semantics so the results match the numpy
+    implementation (inf/nan instead of errors).
+
+    Fixed-step methods use the grid of make_grid and ignore tol. Adaptive
+    methods start with step h and end exactly at b. Implicit methods stay
+    stable on stiff problems, and method 'auto' switches from RK45 to an
+    implicit method when it detects stiffness. If a `stats` dict is
+    passed, the number of steps and evaluations of f is stored in it.
+
+    Stepping stops early, returning the trajectory so far, when y turns
+    inf/nan or beyond DIVERGENCE_LIMIT or the Newton iteration of an
+    implicit step does not converge (the bad point is dropped), when one
+    of the `events` expressions g(x, y) changes sign (the first point past
+    it is kept), after max_steps steps or once time.time() passes the
+    deadline. These are checked every CHECK_STEPS steps and the reason is
+    stored as stats['termination'].
+
+    For systems y0 holds the initial values of y1..yn and the y values are
+    returned as an (n_steps, n_vars) array. Only fixed-step methods support
+    systems.
+
+    A `prefix` is a completed solution of the same problem on a shorter
+    interval, e.g. from before b was increased. Fixed-step methods step on
+    from its last point on the grid of make_grid(x0, h, b) and append the new
+    points to it (BDF2 continues with the last two points), so the result
+    equals a solve from x0. Adaptive methods choose their steps from x0 and
+    an extension would differ, they do not take a prefix. The steps in stats
+    only count the new ones.
+    """
+    spec = _get_method(method)
+    compiled = _compiled(func)
+    _check_system(compiled, spec)
+    _check_prefix(spec, prefix)
+    guard = _Guard(compiled, events, deadline)
+    result = {}
+    n_reused = 0
+    if prefix is not None:
+        x_prefix, y_prefix = prefix
+        n_reused = len(x_prefix)
+        timing.count('reused_points', n_reused)
+
+    with timing.phase('solve'):
+        if spec.adaptive:
+            x_range, y_vals, evaluations = _guarded_adaptive(
+                compiled, method, x0, y0, h, b, tol, guard, max_steps, result,
+            )
+        else:
+            start, y_prev = 0, None
+            if prefix is not None:
+                start, y0 = n_reused, y_prefix[-1]
+                y_prev = y_prefix[-2] if n_reused > 1 else None
+            chunks = list(_guarded_fixed(compiled, method, x0, y0, h, b, CHECK_STEPS, guard, max_steps, result, start,
+                                         y_prev))
+            if len(chunks) == 1:
+                x_range, y_vals = chunks[0]
+            elif not chunks:
+                x_range, y_vals = np.empty(0), np.empty((0, *np.shape(y0)))
+            else:
+                x_range = np.concatenate([chunk[0] for chunk in chunks])
+                y_vals = np.concatenate([chunk[1] for chunk in chunks])
+            evaluations = spec.evaluations_per_step * max(len(x_range) - (0 if prefix is not None else 1), 0)
+
+    n_new = len(x_range) if prefix is not None else max(len(x_range) - 1, 0)
+    if prefix is not None:
+        x_range = np.concatenate((x_prefix, x_range))
+        y_vals = np.concatenate((y_prefix, y_vals))
+
+    timing.count('steps', n_new)
+    timing.count('evaluations', evaluations)
+    if result['termination'] != COMPLETED:
+        timing.count(result['termination'])
+    if stats is not None:
+        stats['steps'] = n_new
+        stats['evaluations'] = evaluations
+        stats['termination'] = result['termination']
+    return (x_range, y_vals)
+
+
+def solve_with_stats(func: str | CompiledExpression | CompiledSystem, method: str, x0: float, y0, h: float, b: float,
+                     tol: float = DEFAULT_TOL, events=(), max_steps: int | None = None, deadline: float | None = None,
+                     prefix: tuple[np.ndarray, np.ndarray] | None = None) -> tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Call `solve` and return its stats too, for solves in worker processes
+    where a passed dict would not come back.
+    """
+    stats = {}
+    x_vals, y_vals = solve(func, method, x0, y0, h, b, tol, stats, events, max_steps, deadline, prefix)
+    return (x_vals, y_vals, stats)
+
+
+def iter_solve(func: str | CompiledExpression | CompiledSystem, method: str, x0: float, y0, h: float, b: float,
+               chunk_size: int = 10_000, tol: float = DEFAULT_TOL, stats: dict | None = None, events=(),
+               max_steps: int | None = None, deadline: float | None = None,
+               prefix: tuple[np.ndarray, np.ndarray] | None = None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Solve like `solve`, yielding the trajectory in chunks of at most
+    chunk_size points, so memory stays bounded however long it is. The
+    early termination checks run on every chunk and the reason is in
+    stats['termination'] once the iterator is exhausted. A `prefix` is
+    extended like in `solve` and handed out first, in chunks as well.
+    Adaptive methods are solved in rounds of CHECK_STEPS steps, handed out
+    as each round finishes.
+    """
+    spec = _get_method(method)
+    compiled = _compiled(func)
+    _check_system(compiled, spec)
+    _check_prefix(spec, prefix)
+    guard = _Guard(compiled, events, deadline)
+    start, y_prev = 0, None
+    if prefix is not None:
+        x_prefix, y_prefix = prefix
+        start, y0 = len(x_prefix), y_prefix[-1]
+        y_prev = y_prefix[-2] if start > 1 else None
+        timing.count('reused_points', start)
+        for i in range(0, start, chunk_size):
+            yield (x_prefix[i:i + chunk_size], y_prefix[i:i + chunk_size])
+
+    result = {}
+    if spec.adaptive:
+        for x_round, y_round, _ in _adaptive_rounds(compiled, method, x0, y0, h, b, tol, guard, max_steps, result):
+            for i in range(0, len(x_round), chunk_size):
+                yield (x_round[i:i + chunk_size], y_round[i:i + chunk_size])
+    else:
+        yield from _guarded_fixed(compiled, method, x0, y0, h, b, chunk_size, guard, max_steps, result, start, y_prev)
+    if stats is not None:
+        stats['termination'] = result['termination']
+
+
+def solve_batch(func: str | CompiledExpression, method: str, x0, y0, h, b, tol=DEFAULT_TOL,
+                max_steps: int | None = None, deadline: float | None = None) -> list[tuple[np.ndarray, np.ndarray, str]]:
+    """
+    Solve many initial value problems sharing one right-hand side together
+    and return (x_vals, y_vals, termination) for every problem.
+
+    The trajectories are stepped in lock-step as columns of one array, so
+    each step is a single vectorized evaluation of f over the whole batch.
+    Columns that end earlier are padded with their last grid point and
+    truncated afterwards. Adaptive methods pick different points for every
+    problem, so they are solved one by one. Systems are not supported.
+    Every column is cut before its first diverged value, like in `solve`
+    (implicit methods solve diverged columns again on their own, a failed
+    Newton iteration stops the whole batch), and every problem stops after
+    max_steps steps. Lock-step rows are
+    solved CHECK_STEPS at a time and all columns stop at the deadline.
+    """
+    spec = _get_method(method)
+    compiled = _compiled(func)
+    if compiled.is_system:
+        raise ValueError("Batch solves do not support systems.")
+    x0, y0, h, b, tol = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x0, y0, h, b, tol)))
+    if spec.adaptive:
+        results = []
+        for params in zip(x0, y0, h, b, tol):
+            stats = {}
+            x_vals, y_vals = solve(compiled, method, *params, stats=stats, max_steps=max_steps, deadline=deadline)
+            results.append((x_vals, y_vals, stats['termination']))
+        return results
+
+    grids = [make_grid(*params) for params in zip(x0, h, b)]
+    n_steps = max(len(grid) for grid in grids)
+    x_range = np.empty((n_steps, len(grids)))
+    for j, grid in enumerate(grids):
+        x_range[:len(grid), j] = grid
+        x_range[len(grid):, j] = grid[-1]
+
+    limit, budget = n_steps, MAX_STEPS
+    if max_steps is not None and n_steps - 1 > max_steps:
+        limit = max_steps + 1
+    y_vals = np.zeros((limit, len(grids)))
+    functions = _functions(compiled, spec, "numpy")
+    with timing.phase('solve'), np.errstate(all='ignore'):
+        for start in range(0, limit, CHECK_STEPS):
+            stop = min(start + CHECK_STEPS, limit)
+            if start == 0:
+                spec.kernel(*functions, x_range[:stop], y0, h, y_vals[:stop])
+            else:
+                # Continue from the last row, like _fixed_chunks.
+                history = (y_vals[start - 2].copy(),) if spec.multistep and start > 1 else ()
+                spec.kernel(*functions, x_range[start - 1:stop], y_vals[start - 1].copy(), h, y_vals[start - 1:stop],
+                            *history)
+            if deadline is not None and stop < limit and time.time() > deadline:
+                limit, budget = stop, MAX_TIME
+                break
+    timing.count('steps', (limit - 1) * len(grids))
+    timing.count('evaluations', spec.evaluations_per_step * (limit - 1) * len(grids))
+    guard = _Guard(compiled)
+    results = []
+    for j, grid in enumerate(grids):
+        grid_end = min(len(grid), limit)
+        n_keep, reason = guard.check(grid[:grid_end], y_vals[:grid_end, j])
+        termination = reason or (budget if grid_end < len(grid) else COMPLETED)
+        results.append((grid[:n_keep], y_vals[:n_keep, j].copy(), termination))
+
+    if spec.implicit:
+        # A Newton iteration failing in one column cuts the whole row, solve
+        # the columns cut that way again on their own.
+        for j, (_, _, termination) in enumerate(results):
+            if termination == DIVERGED:
+                stats = {}
+                x_vals, y_vals = solve(compiled, method, x0[j], y0[j], h[j], b[j], stats=stats, max_steps=max_steps,
+                                       deadline=deadline)
+                results[j] = (x_vals, y_vals, stats['termination'])
+    return results
@@ -0,0 +1,289 @@
+"""
+Stepping loops of the numerical methods.
+
+Kernels take the right-hand side `f`, the x grid, the initial value, the step
+and an output buffer. They only use indexing and float arithmetic, so the same
+source runs on Python lists with the `math` based function and, when numba is
+installed, is JIT-compiled together with the numba version of `f`.
+
+Implicit kernels also take a function built from the sympy derivatives of
+`f`, they are not JIT-compiled.
+"""
+
+
+# Newton iterations of implicit steps stop when the correction is this small
+# relative to y, or after the maximum number of iterations.
+NEWTON_TOL = 1e-10
+NEWTON_MAX_ITERATIONS = 20
+
+# Written where an implicit step fails, so the engine cuts the solution there
+# like at any other non-finite value.
+NAN = float('nan')
+
+# Stability limit of h * |df/dy| for Dormand-Prince, and the number of steps
+# in a row beyond it after which the automatic method treats the problem as
+# stiff.
+DOPRI5_STABILITY_LIMIT = 3.25
+STIFF_STEPS = 15
+
+
+def euler_kernel(f, x_range, y0, h, y_vals):
+    """
+    Euler Method stepping loop.
+    """
+    y = y0
+    y_vals[0] = y
+    for i in range(1, len(x_range)):
+        y = y + h * f(x_range[i - 1], y)
+        y_vals[i] = y
+
+
+def euler_cauchy_kernel(f, x_range, y0, h, y_vals):
+    """
+    Euler-Cauchy Method stepping loop.
+    """
+    y = y0
+    y_vals[0] = y
+    for i in range(1, len(x_range)):
+        f1 = f(x_range[i - 1], y)
+        f2 = f(x_range[i], y + h * f1)
+        y = y + (h / 2) * (f1 + f2)
+        y_vals[i] = y
+
+
+def rk4_kernel(f, x_range, y0, h, y_vals):
+    """
+    Classic fourth order Runge-Kutta stepping loop.
+    """
+    y = y0
+    y_vals[0] = y
+    for i in range(1, len(x_range)):
+        x = x_range[i - 1]
+        k1 = f(x, y)
+        k2 = f(x + h / 2, y + (h / 2) * k1)
+        k3 = f(x + h / 2, y + (h / 2) * k2)
+        k4 = f(x_range[i], y + h * k3)
+        y = y + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+        y_vals[i] = y
+
+
+def implicit_step(f, newton, x, y, rhs, c):
+    """
+    Solve y = rhs + c * f(x, y) with Newton's method starting from y.
+
+    `newton(x, y, c, r)` returns the correction d of (1 - c df/dy(x, y)) d = r
+    and its size relative to y. Returns the solution, the number of
+    evaluations of f and whether the iteration converged.
+    """
+    evaluations = 0
+    for _ in range(NEWTON_MAX_ITERATIONS):
+        d, size = newton(x, y, c, y - rhs - c * f(x, y))
+        evaluations += 1
+        y = y - d
+        if size <= NEWTON_TOL:
+            return y, evaluations, True
+    return y, evaluations, False
+
+
+def backward_euler_kernel(f, newton, x_range, y0, h, y_vals):
+    """
+    Backward (implicit) Euler stepping loop, stable for any step on stiff
+    problems. Like the other implicit kernels it stops at the first step
+    whose Newton iteration does not converge and writes NAN there.
+    """
+    y = y0
+    y_vals[0] = y
+    for i in range(1, len(x_range)):
+        y, _, converged = implicit_step(f, newton, x_range[i], y, y, h)
+        if not converged:
+            y_vals[i] = NAN
+            return
+        y_vals[i] = y
+
+
+def trapezoidal_kernel(f, newton, x_range, y0, h, y_vals):
+    """
+    Implicit trapezoidal rule stepping loop.
+    """
+    y = y0
+    y_vals[0] = y
+    for i in range(1, len(x_range)):
+        rhs = y + (h / 2) * f(x_range[i - 1], y)
+        y, _, converged = implicit_step(f, newton, x_range[i], y, rhs, h / 2)
+        if not converged:
+            y_vals[i] = NAN
+            return
+        y_vals[i] = y
+
+
+def bdf2_kernel(f, newton, x_range, y0, h, y_vals, y_prev=None):
+    """
+    Second order backward differentiation formula stepping loop, started
+    with one backward Euler step unless the value before y0 is given.
+    """
+    y = y0
+    y_vals[0] = y
+    first = 1
+    if y_prev is None and len(x_range) > 1:
+        y_prev = y
+        y, _, converged = implicit_step(f, newton, x_range[1], y, y, h)
+        if not converged:
+            y_vals[1] = NAN
+            return
+        y_vals[1] = y
+        first = 2
+    for i in range(first, len(x_range)):
+        rhs = (4 / 3) * y - (1 / 3) * y_prev
+        y_prev = y
+        y, _, converged = implicit_step(f, newton, x_range[i], y, rhs, (2 / 3) * h)
+        if not converged:
+            y_vals[i] = NAN
+            return
+        y_vals[i] = y
+
+
+def dopri5_kernel(f, x0, y0, h, b, tol, max_steps, stiff_steps=0):
+    """
+    Dormand-Prince RK45 with adaptive step size.
+
+    `h` is the initial step. A step is accepted when the difference between
+    the fifth and fourth order solutions is within tol * (1 + |y|), and the
+    next step is scaled from the error. Returns the lists of accepted x and
+    y values and the number of evaluations of f.
+
+    With `stiff_steps`, integration stops early once that many accepted
+    steps in a row are limited by stability rather than accuracy, estimated
+    from the last two stages as in Hairer's DOPRI5.
+    """
+    x = x0
+    y = y0
+    x_vals = [x]
+    y_vals = [y]
+    k1 = f(x, y)
+    evaluations = 1
+    h_min = 1e-12 * max(1.0, abs(b - x0))
+    stiff = 0
+    non_stiff = 0
+
+    steps = 0
+    while x < b and steps < max_steps:
+        last = x + h >= b
+        if last:
+            h = b - x
+        k2 = f(x + h / 5, y + h * (k1 / 5))
+        k3 = f(x + 3 * h / 10, y + h * (3 * k1 / 40 + 9 * k2 / 40))
+        k4 = f(x + 4 * h / 5, y + h * (44 * k1 / 45 - 56 * k2 / 15 + 32 * k3 / 9))
+        k5 = f(x + 8 * h / 9, y + h * (19372 * k1 / 6561 - 25360 * k2 / 2187 + 64448 * k3 / 6561 - 212 * k4 / 729))
+        y6 = y + h * (9017 * k1 / 3168 - 355 * k2 / 33 + 46732 * k3 / 5247 + 49 * k4 / 176 - 5103 * k5 / 18656)
+        k6 = f(x + h, y6)
+        y_new = y + h * (35 * k1 / 384 + 500 * k3 / 1113 + 125 * k4 / 192 - 2187 * k5 / 6784 + 11 * k6 / 84)
+        k7 = f(x + h, y_new)
+        evaluations += 6
+        steps += 1
+
+        error = h * (71 * k1 / 57600 - 71 * k3 / 16695 + 71 * k4 / 1920
+                     - 17253 * k5 / 339200 + 22 * k6 / 525 - k7 / 40)
+        err = abs(error) / (tol * (1 + max(abs(y), abs(y_new))))
+
+        if err <= 1:
+            if stiff_steps:
+                # h * |df/dy| from two evaluations at the same x.
+                if h * abs(k7 - k6) > DOPRI5_STABILITY_LIMIT * abs(y_new - y6):
+                    stiff += 1
+                    non_stiff = 0
+                else:
+                    non_stiff += 1
+                    if non_stiff == 6:
+                        stiff = 0
+            x = b if last else x + h
+            y = y_new
+            k1 = k7
+            x_vals.append(x)
+            y_vals.append(y)
+            if stiff_steps and stiff >= stiff_steps:
+                break
+
+        if err != err:
+            factor = 0.2
+        elif err == 0:
+            factor = 5.0
+        else:
+            factor = min(5.0, max(0.2, 0.9 * err ** -0.2))
+        h = h * factor
+        if h < h_min:
+            break
+    return x_vals, y_vals, evaluations
+
+
+def rosenbrock23_kernel(f, derivatives, x0, y0, h, b, tol, max_steps):
+    """
+    Rosenbrock 2(3) with adaptive step size, the method of MATLAB's ode23s.
+
+    `derivatives(x, y)` returns (df/dy, df/dx). Each step solves three
+    linear equations with 1 - h d df/dy instead of iterating, and the
+    third stage gives the error estimate of the second order solution.
+    Stable on stiff problems with steps far beyond the explicit limit.
+    """
+    d = 1 / (2 + 2 ** 0.5)
+    e32 = 6 + 2 ** 0.5
+    x = x0
+    y = y0
+    x_vals = [x]
+    y_vals = [y]
+    f0 = f(x, y)
+    evaluations = 1
+    h_min = 1e-12 * max(1.0, abs(b - x0))
+
+    steps = 0
+    while x < b and steps < max_steps:
+        last = x + h >= b
+        if last:
+            h = b - x
+        jacobian, dfdx = derivatives(x, y)
+        w = 1 - h * d * jacobian
+        k1 = (f0 + h * d * dfdx) / w
+        f1 = f(x + h / 2, y + (h / 2) * k1)
+        k2 = (f1 - k1) / w + k1
+        y_new = y + h * k2
+        f2 = f(x + h, y_new)
+        k3 = (f2 - e32 * (k2 - f1) - 2 * (k1 - f0) + h * d * dfdx) / w
+        evaluations += 2
+        steps += 1
+
+        error = (h / 6) * (k1 - 2 * k2 + k3)
+        err = abs(error) / (tol * (1 + max(abs(y), abs(y_new))))
+
+        if err <= 1:
+            x = b if last else x + h
+            y = y_new
+            f0 = f2
+            x_vals.append(x)
+            y_vals.append(y)
+
+        if err != err:
+            factor = 0.2
+        elif err == 0:
+            factor = 5.0
+        else:
+            factor = min(5.0, max(0.2, 0.9 * err ** (-1 / 3)))
+        h = h * factor
+        if h < h_min:
+            break
+    return x_vals, y_vals, evaluations
+
+
+def auto_kernel(f, derivatives, x0, y0, h, b, tol, max_steps):
+    """
+    Dormand-Prince RK45 until the problem turns out to be stiff or RK45
+    stalls, then Rosenbrock 2(3) from that point to b.
+    """
+    x_vals, y_vals, evaluations = dopri5_kernel(f, x0, y0, h, b, tol, max_steps, STIFF_STEPS)
+    x = x_vals[-1]
+    if x < b and y_vals[-1] == y_vals[-1]:
+        if len(x_vals) > 1:
+            h = x - x_vals[-2]
+        x_more, y_more, more = rosenbrock23_kernel(f, derivatives, x, y_vals[-1], h, b, tol, max_steps - len(x_vals) + 1)
+        x_vals.extend(x_more[1:])
+        y_vals.extend(y_more[1:])
+        evaluations += more
+    return x_vals, y_vals, evaluations
@@ -0,0 +1,68 @@
+from app.solvers import kernels
+
+
+DEFAULT_TOL = 1e-6
+
+
+class Method:
+    """
+    A numerical method the engine can run.
+
+    Fixed-step kernels fill the y values over a given grid:
+    `kernel(f, x_range, y0, h, y_vals)`. Adaptive kernels choose their own
+    points: `kernel(f, x0, y0, h, b, tol, max_steps)` returns lists of x and
+    y values and the number of evaluations of f.
+
+    Implicit kernels take a second function after f, built from the
+    Jacobian: `newton(x, y, c, r)` for fixed-step ones (see
+    kernels.implicit_step) and `derivatives(x, y)` returning (df/dy, df/dx)
+    for adaptive ones. Their evaluations per step are typical values, the
+    Newton iterations vary.
+
+    Multistep kernels take the value one step before y0 as a last optional
+    argument `y_prev`, so a run continued from its last points (chunks,
+    extended solutions) gives the same values as one run.
+    """
+
+    def __init__(self, name: str, label: str, kernel, order: int, evaluations_per_step: int, adaptive: bool = False,
+                 implicit: bool = False, multistep: bool = False):
+        self.name = name
+        self.label = label
+        self.kernel = kernel
+        self.order = order
+        self.evaluations_per_step = evaluations_per_step
+        self.adaptive = adaptive
+        self.implicit = implicit
+        self.multistep = multistep
+
+    def __repr__(self) -> str:
+        return f"Method({self.name!r})"
+
+
+METHODS: dict[str, Method] = {}
+
+
+def register(method: Method) -> Method:
+    """
+    Make a method available to the engine and the API by its name.
+    """
+    METHODS[method.name] = method
+    return method
+
+
+register(Method('euler', 'Euler', kernels.euler_kernel, order=1, evaluations_per_step=1))
+register(Method('euler_cauchy', 'Euler-Cauchy', kernels.euler_cauchy_kernel, order=2, evaluations_per_step=2))
+register(Method('rk4', 'Runge-Kutta 4', kernels.rk4_kernel, order=4, evaluations_per_step=4))
+register(Method('rk45', 'Dormand-Prince RK45', kernels.dopri5_kernel, order=5, evaluations_per_step=6, adaptive=True))
+
+# Methods for stiff problems
+register(Method('backward_euler', 'Backward Euler', kernels.backward_euler_kernel, order=1, evaluations_per_step=2,
+                implicit=True))
+register(Method('trapezoidal', 'Trapezoidal', kernels.trapezoidal_kernel, order=2, evaluations_per_step=3,
+                implicit=True))
+register(Method('bdf2', 'BDF2', kernels.bdf2_kernel, order=2, evaluations_per_step=2, implicit=True,
+                multistep=True))
+register(Method('rosenbrock23', 'Rosenbrock 2(3)', kernels.rosenbrock23_kernel, order=2, evaluations_per_step=2,
+                adaptive=True, implicit=True))
+register(Method('auto', 'RK45, Rosenbrock 2(3) when stiff', kernels.auto_kernel, order=2, evaluations_per_step=6,
+                adaptive=True, implicit=True))
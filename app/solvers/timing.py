@@ -0,0 +1,69 @@
+"""
+Per-request timing of the solve path.
+
+Solver code calls `phase(name)` and `count(name)` unconditionally. They only
+record something while a collector is active, which the timing middleware
+sets up for every request, so the solvers stay usable outside Django.
+"""
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class Timings:
+    """
+    Seconds spent per phase and counters of one request.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+
+_current = ContextVar('solver_timings', default=None)
+
+
+def current() -> Timings | None:
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """
+    Record phases and counters into a new Timings for the enclosed code.
+    """
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Add the time spent in the enclosed code to the named phase.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def count(name: str, n: int = 1):
+    timings = _current.get()
+    if timings is not None:
+        timings.count(name, n)
@@ -0,0 +1,262 @@
+import time
+
+import numpy as np
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from app import archive, pool
+from app.models import DifferentialEq, Trajectory
+from app.solvers import timing
+from app.solvers.engine import BUDGET_TERMINATIONS, COMPLETED, count_steps, solve_with_stats
+from app.solvers.methods import DEFAULT_TOL, METHODS
+
+
+def params_of(equation: DifferentialEq) -> dict:
+    """
+    Parameters that identify the solution of an equation.
+    """
+    return {
+        'func': equation.func,
+        'x0': equation.x0,
+        'y0': equation.y0,
+        'h': equation.h,
+        'b': equation.b,
+        'tol': equation.tol,
+        'initial_values': equation.initial_values,
+    }
+
+
+def format_initial_values(values) -> str:
+    """
+    Canonical text of the initial values of a system, as stored in the models.
+    """
+    return ';'.join(repr(float(value)) for value in values)
+
+
+def parse_initial_values(text: str) -> list[float]:
+    return [float(value) for value in text.split(';')] if text else []
+
+
+def initial_state(y0: float, initial_values: str = ''):
+    """
+    What the solver starts from: y0, or the vector of initial values of a system.
+    """
+    return parse_initial_values(initial_values) if initial_values else y0
+
+
+def solve_limits(max_seconds: float | None = None) -> dict:
+    """
+    Step and time budget of the solves of one request, as keyword arguments
+    of the engine. A limit of 0 in the settings means no limit.
+    """
+    max_seconds = settings.SOLVER_MAX_SECONDS if max_seconds is None else max_seconds
+    return {
+        'max_steps': settings.SOLVER_MAX_STEPS or None,
+        'deadline': time.time() + max_seconds if max_seconds else None,
+    }
+
+
+def load_trajectory(func: str, x0: float, y0: float, h: float, b: float, method: str,
+                    tol: float = DEFAULT_TOL, initial_values: str = '',
+                    stats: dict | None = None) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Return the stored trajectory or None if it has not been computed yet.
+    Why the solve stopped is stored in `stats['termination']`.
+
+    Archived trajectories are returned as read-only memory maps, slicing
+    them only reads the slice from disk.
+    """
+    params = {
+        'func': func, 'x0': x0, 'y0': y0, 'h': h, 'b': b, 'tol': tol,
+        'initial_values': initial_values, 'method': method,
+    }
+    stored = Trajectory.objects.filter(**params).values_list('x_vals', 'y_vals', 'termination', 'archive').first()
+    if stored is None:
+        return None
+    if stored[3]:
+        mapped = archive.load(settings.SOLVER_ARCHIVE_DIR, stored[3])
+        if mapped is None:
+            # The files are gone, solve again.
+            Trajectory.objects.filter(**params).delete()
+            return None
+        x_vals, y_vals = mapped
+    else:
+        x_vals, y_vals = np.frombuffer(stored[0], dtype='<f8'), np.frombuffer(stored[1], dtype='<f8')
+        if initial_values:
+            y_vals = y_vals.reshape(-1, len(parse_initial_values(initial_values)))
+    if stats is not None:
+        stats['termination'] = stored[2]
+    return (x_vals, y_vals)
+
+
+def save_trajectory(func: str, x0: float, y0: float, h: float, b: float, method: str,
+                    x_vals: np.ndarray | None, y_vals: np.ndarray | None, tol: float = DEFAULT_TOL,
+                    initial_values: str = '', termination: str = COMPLETED, archive_name: str = ''):
+    """
+    Store a computed trajectory, ignoring one stored concurrently. Results
+    cut by the step or time limit of the request are not stored, they
+    depend on the settings and the load of the server.
+
+    With `archive_name` the trajectory is already in the archive and only
+    its row is created, the files are removed when it is not stored.
+    """
+    if termination in BUDGET_TERMINATIONS:
+        archive.remove(settings.SOLVER_ARCHIVE_DIR, [archive_name] if archive_name else [])
+        return
+    try:
+        with transaction.atomic():
+            Trajectory.objects.create(
+                func=func, x0=x0, y0=y0, h=h, b=b, tol=tol, initial_values=initial_values, method=method,
+                termination=termination, archive=archive_name,
+                x_vals=b'' if archive_name else x_vals.astype('<f8').tobytes(),
+                y_vals=b'' if archive_name else y_vals.astype('<f8').tobytes(),
+            )
+    except IntegrityError:
+        archive.remove(settings.SOLVER_ARCHIVE_DIR, [archive_name] if archive_name else [])
+
+
+def load_or_solve(func: str, x0: float, y0: float, h: float, b: float, method: str,
+                  tol: float = DEFAULT_TOL, initial_values: str = '', stats: dict | None = None,
+                  limits: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the stored trajectory, solving and storing it on the first request.
+
+    The solve runs within `limits` (see solve_limits, by default a fresh
+    budget) and `stats` receives its termination reason.
+    """
+    stats = {} if stats is None else stats
+    stored = load_trajectory(func, x0, y0, h, b, method, tol, initial_values, stats)
+    if stored is not None:
+        timing.count('store_hits')
+        return stored
+    timing.count('store_misses')
+
+    limits = solve_limits() if limits is None else limits
+    prefix, prefix_b = stored_prefix(func, x0, y0, h, b, method, tol, initial_values)
+    n_steps = count_steps(x0, h, b)
+    if prefix is not None:
+        timing.count('store_extensions')
+        n_steps -= count_steps(x0, h, prefix_b)
+    fn, args = solve_call(func, x0, y0, h, b, method, tol, initial_values, limits, prefix)
+    x_vals, y_vals, solve_stats = store_result(
+        pool.call(fn, *args, n_steps=n_steps), func, x0, y0, h, b, method, tol, initial_values, prefix_b,
+    )
+    stats.update(solve_stats)
+    return (x_vals, y_vals)
+
+
+def solve_call(func: str, x0: float, y0: float, h: float, b: float, method: str, tol: float, initial_values: str,
+               limits: dict, prefix=None) -> tuple:
+    """
+    The worker function and its arguments solving the parameters, for
+    pool.call or pool.submit. Solutions of at least SOLVER_ARCHIVE_MIN_POINTS
+    points, and extensions of archived ones, are written into the archive
+    by the worker, which only returns their stats.
+    """
+    y_start = initial_state(y0, initial_values)
+    min_points = settings.SOLVER_ARCHIVE_MIN_POINTS
+    if isinstance(prefix, str) or (min_points and count_steps(x0, h, b) >= min_points):
+        name = archive.new_name({
+            'func': func, 'x0': x0, 'y0': y0, 'h': h, 'b': b, 'tol': tol,
+            'initial_values': initial_values, 'method': method,
+        })
+        return (archive.solve_into, (settings.SOLVER_ARCHIVE_DIR, name, func, method, x0, y_start, h, b, tol,
+                                     limits['max_steps'], limits['deadline'], prefix))
+    return (solve_with_stats, (func, method, x0, y_start, h, b, tol, (), limits['max_steps'], limits['deadline'],
+                               prefix))
+
+
+def store_result(result, func: str, x0: float, y0: float, h: float, b: float, method: str, tol: float,
+                 initial_values: str, prefix_b: float | None = None) -> tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Store the result of the function from solve_call and return it as
+    (x_vals, y_vals, stats), replacing the prefix it extended.
+    """
+    if isinstance(result, dict):
+        stats = result
+        x_vals, y_vals = archive.load(settings.SOLVER_ARCHIVE_DIR, stats['archive'])
+    else:
+        x_vals, y_vals, stats = result
+    save_trajectory(func, x0, y0, h, b, method, x_vals, y_vals, tol, initial_values, stats['termination'],
+                    stats.get('archive', ''))
+    if prefix_b is not None and stats['termination'] not in BUDGET_TERMINATIONS:
+        drop_prefix(func, x0, y0, h, prefix_b, method, tol, initial_values)
+    return (x_vals, y_vals, stats)
+
+
+def stored_prefix(func: str, x0: float, y0: float, h: float, b: float, method: str, tol: float,
+                  initial_values: str) -> tuple:
+    """
+    The longest stored complete solution of the same problem on a shorter
+    interval, which the solve can extend instead of starting over, and its
+    b. Archived prefixes are given by name, the worker maps them itself.
+
+    Only fixed-step methods extend solutions, adaptive ones would choose
+    other steps than a solve from x0.
+    """
+    if METHODS[method].adaptive:
+        return (None, None)
+    shorter = Trajectory.objects.filter(
+        func=func, x0=x0, y0=y0, h=h, b__lt=b, tol=tol, initial_values=initial_values, method=method,
+        termination=COMPLETED,
+    ).order_by('-b').values_list('b', 'archive').first()
+    if shorter is None:
+        return (None, None)
+    if shorter[1]:
+        return (shorter[1], shorter[0])
+    return (load_trajectory(func, x0, y0, h, shorter[0], method, tol, initial_values), shorter[0])
+
+
+def drop_prefix(func: str, x0: float, y0: float, h: float, b: float, method: str, tol: float,
+                initial_values: str):
+    """
+    Delete a prefix once its extension is stored, unless an equation still
+    ends at its b. Other methods keep theirs until they are extended too.
+    """
+    params = {'func': func, 'x0': x0, 'y0': y0, 'h': h, 'b': b, 'tol': tol, 'initial_values': initial_values}
+    if not DifferentialEq.objects.filter(**params).exists():
+        _delete(Trajectory.objects.filter(**params, method=method))
+
+
+def _reusable(params: dict) -> Q:
+    """
+    Stored solutions that can be reused for the parameters: shorter ones to
+    extend (see load_or_solve) and the one with step 2h for error estimates,
+    both only of fixed-step methods.
+    """
+    fixed_step = [name for name, spec in METHODS.items() if not spec.adaptive]
+    same = {key: value for key, value in params.items() if key not in ('h', 'b')}
+    same['method__in'] = fixed_step
+    return Q(**same, h=params['h'], b__lt=params['b']) | Q(**same, h=2 * params['h'], b=params['b'])
+
+
+def invalidate(func: str, x0: float, y0: float, h: float, b: float, tol: float = DEFAULT_TOL,
+               initial_values: str = '', exclude_pk=None, keep_for: dict | None = None):
+    """
+    Delete stored trajectories for the parameters unless another equation
+    still uses them, along with the 2h solution kept for their error
+    estimates. Trajectories the parameters `keep_for` can reuse (those of
+    an equation before b was increased or h halved) are kept.
+    """
+    params = {'func': func, 'x0': x0, 'y0': y0, 'h': h, 'b': b, 'tol': tol, 'initial_values': initial_values}
+    if DifferentialEq.objects.filter(**params).exclude(pk=exclude_pk).exists():
+        return
+    stale = Q(**params)
+    coarse = {**params, 'h': 2 * h}
+    if not DifferentialEq.objects.filter(**coarse).exists():
+        stale |= Q(**coarse)
+    trajectories = Trajectory.objects.filter(stale)
+    if keep_for is not None:
+        trajectories = trajectories.exclude(_reusable(keep_for))
+    _delete(trajectories)
+
+
+def _delete(trajectories):
+    """
+    Delete the trajectories and the archive files of those archived.
+    """
+    names = list(trajectories.exclude(archive='').values_list('archive', flat=True))
+    trajectories.delete()
+    archive.remove(settings.SOLVER_ARCHIVE_DIR, names)
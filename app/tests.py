@@ -1,3 +1,445 @@
-from django.test import TestCase
+import json
+import struct
+import tempfile
+import time
+import unittest
 
-# Create your tests here.
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import sympy as sp
+
+from django.test import TestCase, override_settings
+
+from app import archive, jobs
+from app.api.renderers import TrajectoryRenderer
+from app.models import DifferentialEq, SolveJob, Trajectory
+from app.store import load_or_solve, load_trajectory, save_trajectory, stored_prefix
+from app.solvers.compiler import get_compiled, numba
+from app.solvers.engine import CHECK_STEPS, DIVERGENCE_LIMIT, _integrate, make_grid, solve, solve_batch
+
+
+EQUATION = {'func': '-2*y+sin(x)', 'x0': 0.0, 'y0': 1.0, 'h': 0.01}
+
+
+def baseline_solve(func, method, x0, y0, h, b):
+    """
+    The Euler and Euler-Cauchy loops of the serializer before the kernels,
+    on numpy scalars.
+    """
+    f = sp.lambdify(sp.symbols('x y'), sp.sympify(func), "numpy")
+    x_range = make_grid(x0, h, b)
+    y_vals = np.zeros(len(x_range))
+    y_vals[0] = y0
+    with np.errstate(all='ignore'):
+        for i in range(1, len(x_range)):
+            f1 = f(x_range[i - 1], y_vals[i - 1])
+            if method == 'euler':
+                y_vals[i] = y_vals[i - 1] + h * f1
+            else:
+                f2 = f(x_range[i], y_vals[i - 1] + h * f1)
+                y_vals[i] = y_vals[i - 1] + (h / 2) * (f1 + f2)
+    return (x_range, y_vals)
+
+
+class KernelTests(TestCase):
+    FUNCS = ('-2*y+sin(x)', 'x*y', 'exp(-x)*cos(y)', 'sqrt(abs(y))+x**2')
+
+    def test_known_values_of_y_prime_equals_y(self):
+        # One step of each method multiplies y by a truncated series of e^h.
+        growth = {'euler': 1.1, 'euler_cauchy': 1 + 0.1 + 0.1 ** 2 / 2,
+                  'rk4': 1 + 0.1 + 0.1 ** 2 / 2 + 0.1 ** 3 / 6 + 0.1 ** 4 / 24}
+        for method, factor in growth.items():
+            with self.subTest(method=method):
+                x_vals, y_vals = solve('y', method, 0.0, 1.0, 0.1, 1.0)
+                np.testing.assert_allclose(x_vals, np.linspace(0, 1, 11))
+                np.testing.assert_allclose(y_vals, factor ** np.arange(11), rtol=1e-13)
+
+    def test_rk4_converges_with_fourth_order(self):
+        errors = [abs(solve('-2*y+sin(x)', 'rk4', 0.0, 1.0, h, 2.0)[1][-1] - self.exact(2.0)) for h in (0.02, 0.01)]
+        self.assertAlmostEqual(errors[0] / errors[1], 16, delta=1)
+
+    @staticmethod
+    def exact(x):
+        # Solution of y' = -2y + sin(x), y(0) = 1
+        return (2 * np.sin(x) - np.cos(x)) / 5 + 6 / 5 * np.exp(-2 * x)
+
+    def test_matches_the_baseline_implementation(self):
+        for func in self.FUNCS:
+            for method in ('euler', 'euler_cauchy'):
+                with self.subTest(func=func, method=method):
+                    x_vals, y_vals = solve(func, method, 0.0, 1.0, 0.01, 2.0)
+                    x_base, y_base = baseline_solve(func, method, 0.0, 1.0, 0.01, 2.0)
+                    np.testing.assert_array_equal(x_vals, x_base)
+                    np.testing.assert_allclose(y_vals, y_base, rtol=1e-12)
+
+    def test_numpy_fallback_matches_the_baseline(self):
+        # sqrt of a negative y raises in the math version, numpy gives nan.
+        compiled = get_compiled('sqrt(y)-x')
+        x_range = make_grid(0.0, 0.1, 5.0)
+        for method in ('euler', 'euler_cauchy'):
+            with self.subTest(method=method):
+                y_vals = _integrate(compiled, method, x_range, 1.0, 0.1, False)
+                np.testing.assert_allclose(y_vals, baseline_solve('sqrt(y)-x', method, 0.0, 1.0, 0.1, 5.0)[1],
+                                           rtol=1e-12)
+                self.assertTrue(np.isnan(y_vals[-1]))
+
+    @unittest.skipIf(numba is None, "numba is not installed")
+    def test_jit_matches_python(self):
+        x_range = make_grid(0.0, 0.001, 2.0)
+        for func in self.FUNCS:
+            for method in ('euler', 'euler_cauchy', 'rk4'):
+                with self.subTest(func=func, method=method):
+                    compiled = get_compiled(func)
+                    self.assertIsNotNone(compiled.jitted())
+                    np.testing.assert_allclose(_integrate(compiled, method, x_range, 1.0, 0.001, True),
+                                               _integrate(compiled, method, x_range, 1.0, 0.001, False), rtol=1e-12)
+
+
+@override_settings(SOLVER_ARCHIVE_MIN_POINTS=0, SOLVER_MAX_STEPS=0, SOLVER_MAX_SECONDS=0)
+class ImplicitMethodTests(TestCase):
+    # y' = y^2, y(0) = 1 blows up at x = 1, where the implicit equation of a
+    # step stops having a solution.
+    BLOW_UP = {'func': 'y**2', 'x0': 0.0, 'y0': 1.0, 'h': 0.01, 'b': 2.0}
+
+    def test_unconverged_step_stops_as_diverged(self):
+        for method in ('backward_euler', 'trapezoidal', 'bdf2'):
+            with self.subTest(method=method):
+                stats = {}
+                x_vals, y_vals = solve(self.BLOW_UP['func'], method, 0.0, 1.0, 0.01, 2.0, stats=stats)
+                self.assertEqual(stats['termination'], 'diverged')
+                self.assertLess(x_vals[-1], 1.0)
+                self.assertTrue(np.all(np.diff(y_vals) > 0))
+
+    def test_backward_euler_steps_solve_their_equation(self):
+        x_vals, y_vals = solve(self.BLOW_UP['func'], 'backward_euler', 0.0, 1.0, 0.01, 2.0)
+        residuals = y_vals[1:] - y_vals[:-1] - 0.01 * y_vals[1:] ** 2
+        np.testing.assert_allclose(residuals, 0, atol=1e-8)
+
+    def test_batch_column_is_not_cut_by_another(self):
+        (_, _, blown), (x_vals, _, termination) = solve_batch('y**2', 'backward_euler', 0.0, [1.0, 0.1], 0.01, 2.0)
+        self.assertEqual(blown, 'diverged')
+        self.assertEqual(termination, 'completed')
+        self.assertEqual(x_vals[-1], 2.0)
+
+    def test_diverged_solution_is_not_stored_as_completed(self):
+        stats = {}
+        load_or_solve(**self.BLOW_UP, method='bdf2', stats=stats)
+        self.assertEqual(stats['termination'], 'diverged')
+        self.assertEqual(Trajectory.objects.get(method='bdf2').termination, 'diverged')
+
+
+@override_settings(SOLVER_ARCHIVE_MIN_POINTS=0, SOLVER_MAX_STEPS=0, SOLVER_MAX_SECONDS=0)
+class ExtendSolutionTests(TestCase):
+    def assert_fresh(self, method, b, x_vals, y_vals):
+        x_fresh, y_fresh = solve(EQUATION['func'], method, EQUATION['x0'], EQUATION['y0'], EQUATION['h'], b)
+        np.testing.assert_array_equal(x_vals, x_fresh)
+        np.testing.assert_array_equal(y_vals, y_fresh)
+
+    def test_extension_matches_fresh_solve(self):
+        for method in ('euler', 'rk4', 'bdf2'):
+            with self.subTest(method=method):
+                load_or_solve(**EQUATION, b=1.0, method=method)
+                stats = {}
+                x_vals, y_vals = load_or_solve(**EQUATION, b=3.0, method=method, stats=stats)
+                self.assertEqual(stats['termination'], 'completed')
+                self.assert_fresh(method, 3.0, x_vals, y_vals)
+                # No equation ends at b = 1, the extended prefix is dropped.
+                self.assertIsNone(load_trajectory(**EQUATION, b=1.0, method=method))
+
+    def test_adaptive_methods_solve_again(self):
+        for method in ('rk45', 'rosenbrock23', 'auto'):
+            with self.subTest(method=method):
+                load_or_solve(**EQUATION, b=1.0, method=method)
+                self.assertEqual(stored_prefix(**EQUATION, b=3.0, method=method, tol=1e-6, initial_values=''),
+                                 (None, None))
+                x_vals, y_vals = load_or_solve(**EQUATION, b=3.0, method=method)
+                self.assert_fresh(method, 3.0, x_vals, y_vals)
+
+    def test_increasing_b_extends_the_stored_solution(self):
+        equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=1.0)
+        load_or_solve(**EQUATION, b=1.0, method='rk4')
+        equation.b = 2.0
+        equation.save()
+        self.assertIsNotNone(load_trajectory(**EQUATION, b=1.0, method='rk4'))
+
+        x_vals, y_vals = load_or_solve(**EQUATION, b=2.0, method='rk4')
+        self.assert_fresh('rk4', 2.0, x_vals, y_vals)
+        self.assertFalse(Trajectory.objects.filter(b=1.0).exists())
+
+
+@override_settings(SOLVER_ARCHIVE_MIN_POINTS=0)
+class InvalidateTests(TestCase):
+    def test_kept_while_another_equation_uses_the_parameters(self):
+        first = DifferentialEq.objects.create(name='first', **EQUATION, b=1.0)
+        second = DifferentialEq.objects.create(name='second', **EQUATION, b=1.0)
+        load_or_solve(**EQUATION, b=1.0, method='euler')
+
+        first.delete()
+        self.assertIsNotNone(load_trajectory(**EQUATION, b=1.0, method='euler'))
+        second.delete()
+        self.assertIsNone(load_trajectory(**EQUATION, b=1.0, method='euler'))
+
+    def test_edit_drops_the_old_solution(self):
+        equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=1.0)
+        load_or_solve(**EQUATION, b=1.0, method='euler')
+        equation.y0 = 2.0
+        equation.save()
+        self.assertFalse(Trajectory.objects.exists())
+
+    def test_halving_h_keeps_the_2h_solution(self):
+        equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=1.0)
+        load_or_solve(**EQUATION, b=1.0, method='rk4')
+        equation.h = EQUATION['h'] / 2
+        equation.save()
+        self.assertIsNotNone(load_trajectory(**EQUATION, b=1.0, method='rk4'))
+
+        # Dropped together with the solution it estimates the error of.
+        fine = {**EQUATION, 'h': EQUATION['h'] / 2}
+        load_or_solve(**fine, b=1.0, method='rk4')
+        equation.delete()
+        self.assertFalse(Trajectory.objects.exists())
+
+
+@override_settings(SOLVER_ARCHIVE_MIN_POINTS=0, SOLVER_MAX_STEPS=0, SOLVER_MAX_SECONDS=0)
+class CompareTests(TestCase):
+    def test_estimate_does_not_depend_on_a_stored_2h_solution(self):
+        equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=1.0)
+        url = f'/api/differentialeq/{equation.pk}/compare/?methods=euler&methods=rk4'
+        first = self.client.get(url)
+        load_or_solve(**{**EQUATION, 'h': 2 * EQUATION['h']}, b=1.0, method='euler')
+        load_or_solve(**{**EQUATION, 'h': 2 * EQUATION['h']}, b=1.0, method='rk4')
+        second = self.client.get(url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['ETag'], second['ETag'])
+        for method in ('euler', 'rk4'):
+            self.assertEqual(first.json()['methods'][method]['error_estimate'],
+                             second.json()['methods'][method]['error_estimate'])
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(SOLVER_ARCHIVE_MIN_POINTS=50, SOLVER_ARCHIVE_DIR=self.directory,
+                                     SOLVER_MAX_STEPS=0, SOLVER_MAX_SECONDS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_adaptive_solution_is_written_in_rounds(self):
+        # Rounds restart from their last point, solve uses the same rounds.
+        with mock.patch('app.solvers.engine.CHECK_STEPS', 50):
+            stats = archive.solve_into(self.directory, 'rounds', EQUATION['func'], 'rk45', 0.0, 1.0, 0.01, 30.0, 1e-8)
+            x_fresh, y_fresh = solve(EQUATION['func'], 'rk45', 0.0, 1.0, 0.01, 30.0, 1e-8)
+        x_vals, y_vals = archive.load(self.directory, 'rounds')
+        self.assertEqual((stats['termination'], stats['points']), ('completed', len(x_fresh)))
+        np.testing.assert_array_equal(x_vals, x_fresh)
+        np.testing.assert_array_equal(y_vals, y_fresh)
+
+    def test_pages_of_an_archived_solution(self):
+        equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=3.0)
+        url = f'/api/differentialeq/{equation.pk}/solution/?method=rk4&offset=100&limit=20'
+        page = self.client.get(url).json()
+        self.assertTrue(Trajectory.objects.get().archive)
+        x_fresh, y_fresh = solve(EQUATION['func'], 'rk4', EQUATION['x0'], EQUATION['y0'], EQUATION['h'], 3.0)
+        self.assertEqual(page['points'], len(x_fresh))
+        self.assertEqual(page['x_res'], x_fresh[100:120].tolist())
+        self.assertEqual(page['y_res'], y_fresh[100:120].tolist())
+
+        equation.delete()
+        self.assertFalse(Trajectory.objects.exists())
+        self.assertEqual(list(Path(self.directory).iterdir()), [])
+
+    def test_extends_an_archived_prefix(self):
+        for method in ('rk4', 'bdf2'):
+            with self.subTest(method=method):
+                load_or_solve(**EQUATION, b=1.0, method=method)
+                prefix = Trajectory.objects.get(b=1.0, method=method).archive
+                self.assertTrue(prefix)
+
+                x_vals, y_vals = load_or_solve(**EQUATION, b=3.0, method=method)
+                self.assertIsInstance(x_vals, np.memmap)
+                x_fresh, y_fresh = solve(EQUATION['func'], method, EQUATION['x0'], EQUATION['y0'], EQUATION['h'], 3.0)
+                np.testing.assert_array_equal(x_vals, x_fresh)
+                np.testing.assert_array_equal(y_vals, y_fresh)
+
+                self.assertFalse(Trajectory.objects.filter(b=1.0, method=method).exists())
+                self.assertEqual(list(Path(self.directory).glob(f'{prefix}.*')), [])
+
+
+@override_settings(SOLVER_ARCHIVE_MIN_POINTS=0)
+class JobTests(TestCase):
+    def setUp(self):
+        self.equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=1.0)
+        patcher = mock.patch('app.jobs.pool.submit')
+        self.submit = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pending_job_is_reused(self):
+        job, created = jobs.submit(self.equation, 'rk4')
+        self.assertTrue(created)
+        self.assertEqual(jobs.submit(self.equation, 'rk4'), (job, False))
+
+    def test_job_of_an_exited_process_is_not_reused(self):
+        job, _ = jobs.submit(self.equation, 'rk4')
+        # No process has a pid above the kernel's limit.
+        SolveJob.objects.filter(pk=job.pk).update(worker=f'{job.worker.rpartition(":")[0]}:99999999')
+
+        new_job, created = jobs.submit(self.equation, 'rk4')
+        self.assertTrue(created)
+        self.assertNotEqual(new_job.pk, job.pk)
+        self.assertEqual(SolveJob.objects.get(pk=job.pk).status, SolveJob.FAILED)
+
+    def test_exiting_process_fails_its_jobs(self):
+        job, _ = jobs.submit(self.equation, 'rk4')
+        jobs.fail_own_jobs()
+        self.assertEqual(SolveJob.objects.get(pk=job.pk).status, SolveJob.FAILED)
+
+
+class TrajectoryRendererTests(TestCase):
+    def test_buffers_are_aligned(self):
+        for name in ('', 'a', 'abcdefgh', 'a' * 13):
+            with self.subTest(name=name):
+                y_vals = np.arange(12.0).reshape(6, 2)
+                content = TrajectoryRenderer().render({
+                    'meta': {'name': name}, 'grid': {'x0': 0.0, 'h': 0.5, 'n': 6}, 'arrays': {'y_res': y_vals},
+                })
+                magic, version, header_length = struct.unpack_from('<4sB3xI', content)
+                offset = 12 + header_length
+                self.assertEqual((magic, version), (b'DSTR', 1))
+                self.assertEqual(offset % 8, 0)
+                header = json.loads(content[12:offset])
+                self.assertEqual(header['meta'], {'name': name})
+                self.assertEqual(header['arrays'], [{'name': 'y_res', 'length': 12, 'shape': [6, 2]}])
+                np.testing.assert_array_equal(np.frombuffer(content, '<f8', offset=offset).reshape(6, 2), y_vals)
+
+
+class FunctionValidationTests(TestCase):
+    def create(self, func, initial_values=()):
+        return self.client.post('/api/differentialeq/', {
+            'name': func, 'func': func, 'x0': 0, 'y0': 1, 'h': 0.1, 'b': 1, 'initial_values': list(initial_values),
+        }, content_type='application/json')
+
+    def test_rejects_unknown_symbols_and_non_expressions(self):
+        for func in ('x+z', '[x]', 'x>1', 'f(x)+y', 'y1+z; y2'):
+            with self.subTest(func=func):
+                response = self.create(func, (1, 0) if ';' in func else ())
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('func', response.json())
+
+    def test_accepts_equations_and_systems(self):
+        self.assertEqual(self.create('-2*y+sin(x)').status_code, 201)
+        self.assertEqual(self.create('pi*x').status_code, 201)
+        self.assertEqual(self.create('y2; -y1', (1, 0)).status_code, 201)
+
+
+@override_settings(SOLVER_ARCHIVE_MIN_POINTS=0, SOLVER_MAX_STEPS=0, SOLVER_MAX_SECONDS=0)
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=1.0)
+        self.url = f'/api/differentialeq/{self.equation.pk}/'
+
+    def assert_revalidates(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        etag = response['ETag']
+        not_modified = self.client.get(url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+        return etag
+
+    def test_detail_solution_and_stored_stream(self):
+        self.assert_revalidates(self.url)
+        self.assert_revalidates(self.url, Accept=TrajectoryRenderer.media_type)
+        self.assert_revalidates(f'{self.url}solution/?method=rk4')
+        # Stored by the solution request, live streams have no ETag.
+        self.assert_revalidates(f'{self.url}stream/?method=rk4')
+
+    def test_live_stream_is_not_cached(self):
+        response = self.client.get(f'{self.url}stream/?method=rk4&events=y-0.5')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', response['Cache-Control'])
+
+    def test_media_type_and_query_are_part_of_the_key(self):
+        json_etag = self.client.get(self.url)['ETag']
+        binary_etag = self.client.get(self.url, headers={'Accept': TrajectoryRenderer.media_type})['ETag']
+        reduced_etag = self.client.get(f'{self.url}?max_points=5')['ETag']
+        self.assertEqual(len({json_etag, binary_etag, reduced_etag}), 3)
+        self.assertEqual(self.client.get(f'{self.url}solution/?method=rk4&offset=2&limit=3')['ETag'],
+                         self.client.get(f'{self.url}solution/?limit=3&method=rk4&offset=2')['ETag'])
+
+    def test_edit_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.patch(self.url, {'b': 2.0}, content_type='application/json').status_code, 200)
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class TerminationTests(TestCase):
+    def solve(self, *args, **kwargs):
+        stats = {}
+        x_vals, y_vals = solve(*args, stats=stats, **kwargs)
+        return (x_vals, y_vals, stats['termination'])
+
+    def test_completed(self):
+        x_vals, _, termination = self.solve('-y', 'rk4', 0.0, 1.0, 0.01, 1.0)
+        self.assertEqual(termination, 'completed')
+        self.assertEqual(x_vals[-1], 1.0)
+
+    def test_diverged_drops_the_bad_points(self):
+        x_vals, y_vals, termination = self.solve('y**2', 'rk4', 0.0, 1.0, 0.01, 2.0)
+        self.assertEqual(termination, 'diverged')
+        self.assertTrue(np.all(np.isfinite(y_vals)) and np.all(np.abs(y_vals) <= DIVERGENCE_LIMIT))
+        self.assertLess(x_vals[-1], 1.1)
+
+    def test_stalled_adaptive_step(self):
+        x_vals, _, termination = self.solve('1/(x-1)', 'rk45', 0.0, 1.0, 0.01, 2.0)
+        self.assertEqual(termination, 'stalled')
+        self.assertLess(x_vals[-1], 1.0)
+
+    def test_event_keeps_the_first_point_past_it(self):
+        x_vals, y_vals, termination = self.solve('-y', 'rk4', 0.0, 1.0, 0.01, 5.0, events=('y-0.5',))
+        self.assertEqual(termination, 'event')
+        self.assertGreater(y_vals[-2], 0.5)
+        self.assertLess(y_vals[-1], 0.5)
+
+    def test_max_steps(self):
+        x_vals, _, termination = self.solve('-y', 'rk4', 0.0, 1.0, 0.01, 1.0, max_steps=10)
+        self.assertEqual(termination, 'max_steps')
+        self.assertEqual(len(x_vals), 11)
+
+    def test_batch_max_steps(self):
+        for x_vals, _, termination in solve_batch('-y', 'rk4', 0.0, [1.0, 2.0], 0.01, [1.0, 0.03], max_steps=5):
+            self.assertEqual(termination, 'max_steps' if len(x_vals) == 6 else 'completed')
+            self.assertLessEqual(len(x_vals), 6)
+
+    def test_max_time_stops_after_a_chunk(self):
+        x_vals, _, termination = self.solve('-y', 'euler', 0.0, 1.0, 1e-5, 5.0, deadline=time.time() - 1)
+        self.assertEqual(termination, 'max_time')
+        self.assertEqual(len(x_vals), CHECK_STEPS)
+
+    def test_budget_terminations_are_not_stored(self):
+        for termination in ('max_steps', 'max_time'):
+            with self.subTest(termination=termination):
+                x_vals, y_vals = solve('-y', 'euler', 0.0, 1.0, 0.1, 1.0)
+                save_trajectory('-y', 0.0, 1.0, 0.1, 1.0, 'euler', x_vals, y_vals, termination=termination)
+                self.assertFalse(Trajectory.objects.exists())
+        save_trajectory('-y', 0.0, 1.0, 0.1, 1.0, 'euler', x_vals, y_vals, termination='diverged')
+        self.assertEqual(Trajectory.objects.get().termination, 'diverged')
+
+    @override_settings(SOLVER_ARCHIVE_MIN_POINTS=0, SOLVER_MAX_STEPS=10, SOLVER_MAX_SECONDS=0)
+    def test_request_over_its_budget_is_neither_stored_nor_cached(self):
+        equation = DifferentialEq.objects.create(name='equation', **EQUATION, b=1.0)
+        response = self.client.get(f'/api/differentialeq/{equation.pk}/solution/?method=rk4')
+        self.assertEqual(response.json()['termination'], 'max_steps')
+        self.assertEqual(len(response.json()['x_res']), 11)
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertFalse(Trajectory.objects.exists())
@@ -0,0 +1,50 @@
+"""
+Gunicorn settings of the production server, read from the environment.
+
+    SERVER_INTERFACE       asgi (uvicorn workers, default) or wsgi (threaded sync workers)
+    WEB_CONCURRENCY        worker processes, defaults to the CPU count
+    WEB_THREADS            threads per wsgi worker
+    WEB_MAX_REQUESTS       requests after which a worker is replaced (0, the default, disables
+                           recycling, which would end the background jobs of the worker)
+    WEB_MAX_REQUESTS_JITTER  random extra requests, so workers do not restart together
+    WEB_TIMEOUT            seconds a silent worker is given before it is killed
+    WEB_GRACEFUL_TIMEOUT   seconds a stopping worker has to finish its requests
+    PORT                   port to listen on
+"""
+import os
+import threading
+
+
+cpu_count = os.cpu_count() or 1
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", cpu_count))
+
+if os.getenv("SERVER_INTERFACE", "asgi") == "asgi":
+    wsgi_app = "settings.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "settings.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.getenv("WEB_THREADS", 4))
+
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("WEB_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+accesslog = "-"
+
+# Every worker starts its own solver pool, share the cores between them.
+os.environ.setdefault("SOLVER_WORKERS", str(max(1, cpu_count // workers)))
+
+
+def worker_exit(server, worker):
+    # Let running background solves finish within the graceful timeout and
+    # fail the jobs that did not, so they are not left pending.
+    from app import jobs, pool
+    waiting = threading.Thread(target=pool.shutdown, daemon=True)
+    waiting.start()
+    waiting.join(max(worker.cfg.graceful_timeout - 5, 0))
+    jobs.fail_own_jobs()
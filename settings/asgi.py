@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.settings")
+# Sync views share the server's GIL under ASGI, send long solves to the worker pool.
+os.environ.setdefault("SOLVER_OFFLOAD", "True")
+# Requests run in changing threads under ASGI, where persistent connections
+# are not reused but pile up, so they are closed after every request.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "app.middleware.TimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -60,9 +61,22 @@ DATABASES = {
     "default": {
         "ENGINE": os.getenv("DB_ENGINE"),
         "NAME": BASE_DIR / os.getenv("DB_NAME"),
+        # Keep connections open between requests instead of reconnecting every time
+        # (WSGI only, settings/asgi.py defaults to 0)
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # WAL lets readers run while a write is in progress, writers wait for the
+    # lock up to the busy timeout instead of failing with "database is locked".
+    DATABASES["default"]["OPTIONS"] = {
+        "timeout": float(os.getenv("DB_BUSY_TIMEOUT", 20)),
+        "transaction_mode": "IMMEDIATE",
+        "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -90,3 +104,42 @@ USE_TZ = True
 STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Background solve jobs
+SOLVER_WORKERS = int(os.getenv("SOLVER_WORKERS", os.cpu_count() or 1))
+SOLVER_JOB_STALE_AFTER = int(os.getenv("SOLVER_JOB_STALE_AFTER", 3600))
+
+# Budget of every synchronous request (0 for no limit), solves stop early and
+# return the trajectory so far. Background jobs have their own time limit.
+SOLVER_MAX_STEPS = int(os.getenv("SOLVER_MAX_STEPS", 100_000_000))
+SOLVER_MAX_SECONDS = float(os.getenv("SOLVER_MAX_SECONDS", 60))
+SOLVER_JOB_MAX_SECONDS = float(os.getenv("SOLVER_JOB_MAX_SECONDS", 3600))
+
+# Solutions of at least this many points are stored as memory-mapped .npy files
+# in the archive directory instead of the database (0 keeps them all in the database)
+SOLVER_ARCHIVE_DIR = BASE_DIR / os.getenv("SOLVER_ARCHIVE_DIR", "archive")
+SOLVER_ARCHIVE_MIN_POINTS = int(os.getenv("SOLVER_ARCHIVE_MIN_POINTS", 1_000_000))
+
+# Seconds clients and proxies may reuse a solution without revalidating its ETag
+SOLVER_CACHE_MAX_AGE = int(os.getenv("SOLVER_CACHE_MAX_AGE", 0))
+
+# Run long synchronous solves in the worker pool (enabled by settings/asgi.py)
+SOLVER_OFFLOAD = os.getenv("SOLVER_OFFLOAD", "False") == "True"
+SOLVER_OFFLOAD_MIN_STEPS = int(os.getenv("SOLVER_OFFLOAD_MIN_STEPS", 20_000))
+
+# Request timing and profiling
+SOLVER_PROFILING = os.getenv("SOLVER_PROFILING", "False") == "True"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "app": {
+            "handlers": ["console"],
+            "level": os.getenv("LOG_LEVEL", "WARNING"),
+        },
+    },
+}
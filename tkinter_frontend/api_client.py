@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+
+from pathlib import Path
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from trajectory_format import MEDIA_TYPE, decode
+
+
+class ApiClient:
+    """
+    Client of the solver API shared by all tabs.
+
+    One pooled session keeps connections open between requests. Solved
+    trajectories are cached on disk together with their ETag and revalidated
+    with `If-None-Match`, so a trajectory that did not change is not
+    downloaded again.
+    """
+
+    def __init__(self, base_url, cache_dir=None, cache_max_bytes=500 * 2**20):
+        self.base_url = base_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.cache_dir = Path(cache_dir or os.getenv("DIFFSOLVER_CACHE", Path.home() / ".cache" / "diffsolver"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_max_bytes = cache_max_bytes
+
+    def list_equations(self, after_id=None):
+        """
+        All equations, or only those with an id greater than after_id.
+        """
+        equations = []
+        url = self.base_url
+        params = {"page_size": 1000}
+        if after_id is not None:
+            params["id__gt"] = after_id
+        while url:
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            page = response.json()
+            equations.extend(page["results"])
+            url, params = page["next"], None
+        return equations
+
+    def create_equation(self, data):
+        response = self.session.post(self.base_url, json=data)
+        response.raise_for_status()
+        return response.json()
+
+    def bulk_create(self, entries):
+        return self.session.post(f"{self.base_url}bulk-create/", json=entries)
+
+    def trajectory(self, equation_id, task=None, cache=True, **params):
+        """
+        Decoded trajectories of the equation, from the disk cache if the
+        server confirms they are still current. One-off requests, like the
+        x-ranges of a zoomed plot, can bypass the cache.
+
+        With a task (see tasks.py), the download reports its progress and
+        stops when the task is cancelled.
+        """
+        path = self._cache_path(equation_id, params)
+        cached = self._read_cache(path) if cache else None
+        headers = {"Accept": MEDIA_TYPE}
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+
+        if task is not None:
+            task.progress(None, "Solving...")
+        url = f"{self.base_url}{equation_id}/"
+        with self.session.get(url, params=params, headers=headers, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                os.utime(path)
+                return decode(cached[1])
+            response.raise_for_status()
+            content = self._download(response, task)
+
+        results = decode(content)
+        etag = response.headers.get("ETag")
+        if cache and etag:
+            self._write_cache(path, etag, content)
+        return results
+
+    @staticmethod
+    def _download(response, task, chunk_size=2**16):
+        if task is None:
+            return response.content
+        total = int(response.headers.get("Content-Length") or 0)
+        content = bytearray()
+        for chunk in response.iter_content(chunk_size):
+            content.extend(chunk)
+            task.progress(len(content) / total if total else None, "Downloading...")
+        return bytes(content)
+
+    def _cache_path(self, equation_id, params):
+        key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        return self.cache_dir / f"{equation_id}-{key}.bin"
+
+    @staticmethod
+    def _read_cache(path):
+        try:
+            etag, content = path.read_bytes().split(b"\n", 1)
+        except (OSError, ValueError):
+            return None
+        return (etag.decode(), content)
+
+    def _write_cache(self, path, etag, content):
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_bytes(etag.encode() + b"\n" + content)
+            tmp.replace(path)
+            self._prune_cache()
+        except OSError:
+            pass
+
+    def _prune_cache(self):
+        # Drop the least recently used files once the cache is too large.
+        files = sorted(self.cache_dir.glob("*.bin"), key=lambda f: f.stat().st_mtime, reverse=True)
+        total = 0
+        for file in files:
+            total += file.stat().st_size
+            if total > self.cache_max_bytes:
+                file.unlink(missing_ok=True)
@@ -1,4 +1,3 @@
-import threading
 import os
 
 import tkinter as tk
@@ -6,8 +5,10 @@ import tkinter as tk
 from tkinter import ttk
 from dotenv import load_dotenv
 
+from api_client import ApiClient
 from results_tab import ResultsTab
 from post_tab import PostTab
+from tasks import TaskRunner
 
 
 load_dotenv()
@@ -17,11 +18,16 @@ API_URL = os.getenv("API_URL")
 
 class CalculatorApp:
     def __init__(self):
+        self.api = ApiClient(API_URL)
+
         self.main_window = tk.Tk()
         self.main_window.title("ODE Calculator")
         self.main_window.geometry("1000x700")
 
         self.main_window.minsize(800, 600)
+
+        # Network and decode work runs here, off the Tk main loop
+        self.tasks = TaskRunner(self.main_window)
   
         self.style = ttk.Style(self.main_window)
         self.style.theme_use('clam')
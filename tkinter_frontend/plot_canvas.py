@@ -0,0 +1,117 @@
+import numpy as np
+
+from tkinter import ttk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+
+class PlotCanvas(ttk.Frame):
+    """
+    One figure and canvas kept for the lifetime of the tab.
+
+    New results replace the data of the existing lines. The lines are drawn
+    with blitting on top of a cached background of the axes, so a redraw
+    that keeps the axis limits only repaints the lines. Zooming or panning
+    with the toolbar calls on_xlim_changed with the visible x-range once the
+    view has settled, so callers can load more detailed data for it.
+    """
+    # Above this many points markers would only hide the line.
+    MARKER_THRESHOLD = 200
+    # Milliseconds the view has to stay unchanged before on_xlim_changed.
+    ZOOM_DELAY = 300
+
+    def __init__(self, parent, labels, colors, on_xlim_changed=None):
+        super().__init__(parent)
+        self.on_xlim_changed = on_xlim_changed
+        self.background = None
+        self._zoom_job = None
+        self._updating = False
+
+        self.figure = Figure(figsize=(8, 4), dpi=100)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel("x")
+        self.ax.set_ylabel("y")
+        self.ax.minorticks_on()
+        self.ax.grid(which='major', linewidth=1.2)
+        self.ax.grid(which='minor', linewidth=0.5)
+        self.lines = [
+            self.ax.plot([], [], label=label, color=color, animated=True)[0]
+            for label, color in zip(labels, colors)
+        ]
+        self.legend = self.ax.legend()
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self)
+        toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
+        toolbar.pack(side="bottom", fill="x")
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
+        self.clear()
+
+    def clear(self, title="No data available"):
+        self.show(title, [(np.empty(0), np.empty(0))] * len(self.lines))
+
+    def show(self, title, series):
+        """
+        Shows new (x, y) series, one per line, and fits the axes to them.
+        """
+        self._set_data(series)
+        has_data = any(len(x) for x, _ in series)
+        self.ax.set_title(title)
+        self.legend.set_visible(has_data)
+        if has_data:
+            x_all = np.concatenate([x for x, _ in series])
+            y_all = np.concatenate([y for _, y in series])
+            y_all = y_all[np.isfinite(y_all)]
+            self._updating = True
+            try:
+                self.ax.set_xlim(np.min(x_all) - 0.5, np.max(x_all) + 0.5)
+                if len(y_all):
+                    self.ax.set_ylim(np.min(y_all) - 0.5, np.max(y_all) + 0.5)
+            finally:
+                self._updating = False
+        self.canvas.draw_idle()
+
+    def update_data(self, series):
+        """
+        Replaces the data of the lines without changing the view, repainting
+        only the lines.
+        """
+        self._set_data(series)
+        self._blit()
+
+    def x_range(self):
+        return self.ax.get_xlim()
+
+    def _set_data(self, series):
+        for line, (x, y) in zip(self.lines, series):
+            line.set_data(x, y)
+            line.set_marker("o" if len(x) <= self.MARKER_THRESHOLD else "")
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _blit(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for line in self.lines:
+            self.ax.draw_artist(line)
+        self.canvas.blit(self.figure.bbox)
+
+    def _on_xlim_changed(self, ax):
+        if self._updating or self.on_xlim_changed is None:
+            return
+        if self._zoom_job is not None:
+            self.after_cancel(self._zoom_job)
+        self._zoom_job = self.after(self.ZOOM_DELAY, self._zoom_settled)
+
+    def _zoom_settled(self):
+        self._zoom_job = None
+        self.on_xlim_changed(*self.ax.get_xlim())
@@ -1,17 +1,11 @@
+import csv
 import requests
-import threading
 import os
 
 import tkinter as tk
 import sympy as sp
 
-from tkinter import ttk
-from dotenv import load_dotenv
-
-
-load_dotenv()
-
-API_URL = os.getenv("API_URL")
+from tkinter import filedialog, ttk
 
 
 class PostTab(ttk.Frame):
@@ -69,6 +63,10 @@ class PostTab(ttk.Frame):
         self.submit_button.grid(row=row_index, column=0, columnspan=2, pady=10)
         row_index += 1
 
+        self.import_button = ttk.Button(container, text="Import CSV...", command=self.import_entries)
+        self.import_button.grid(row=row_index, column=0, columnspan=2, pady=(0, 10))
+        row_index += 1
+
         self.feedback_label = ttk.Label(container, text="", foreground="red")
         self.feedback_label.grid(row=row_index, column=0, columnspan=2)
 
@@ -149,10 +147,65 @@ class PostTab(ttk.Frame):
             "h": h,
         }
 
+        self.submit_button.config(state="disabled")
+        self.feedback_label.config(text="Submitting...", foreground="gray")
+        self.app.tasks.submit(
+            lambda task: self.app.api.create_equation(submission_data),
+            on_done=lambda equation: self._submitted("Entry successfully created!"),
+            on_error=self._submit_failed,
+        )
+
+    def import_entries(self):
+        """
+        Creates all entries of a CSV file with the columns name, func, x0, y0,
+        b, h (and optionally tol) in a single request.
+        """
+        path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+
+        try:
+            with open(path, newline="") as file:
+                entries = []
+                for row in csv.DictReader(file):
+                    entry = {"name": row["name"], "func": row["func"]}
+                    for key in ("x0", "y0", "b", "h", "tol"):
+                        if row.get(key):
+                            entry[key] = float(row[key])
+                    entries.append(entry)
+        except (OSError, KeyError, ValueError) as e:
+            self.feedback_label.config(text=f"Could not read {os.path.basename(path)}: {e}", foreground="red")
+            return
+
+        self.import_button.config(state="disabled")
+        self.feedback_label.config(text=f"Importing {len(entries)} entries...", foreground="gray")
+        self.app.tasks.submit(
+            lambda task: self.app.api.bulk_create(entries),
+            on_done=lambda response: self._imported(response, len(entries)),
+            on_error=self._submit_failed,
+        )
+
+    def _imported(self, response, count):
+        if response.status_code == 400:
+            self.import_button.config(state="normal")
+            self.feedback_label.config(text=f"Invalid entries: {response.text[:300]}", foreground="red")
+            return
         try:
-            response = requests.post(API_URL, json=submission_data)
             response.raise_for_status()
-            self.feedback_label.config(text="Entry successfully created!", foreground="green")
-            self.app.res_tab.fetch_equations()
         except requests.exceptions.RequestException as e:
-            self.feedback_label.config(text=f"Error: {e}", foreground="red")
+            self._submit_failed(e)
+            return
+        self._submitted(f"{count} entries successfully created!")
+
+    def _submitted(self, message):
+        self.submit_button.config(state="normal")
+        self.import_button.config(state="normal")
+        self.feedback_label.config(text=message, foreground="green")
+        self.app.res_tab.fetch_equations(incremental=True)
+
+    def _submit_failed(self, error):
+        self.submit_button.config(state="normal")
+        self.import_button.config(state="normal")
+        if not isinstance(error, requests.exceptions.RequestException):
+            raise error
+        self.feedback_label.config(text=f"Error: {error}", foreground="red")
@@ -1,16 +1,9 @@
 import requests
-import threading
-import os
 
 from tkinter import ttk, messagebox
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from dotenv import load_dotenv
 
-
-load_dotenv()
-
-API_URL = os.getenv("API_URL")
+from plot_canvas import PlotCanvas
+from virtual_table import VirtualTable
 
 
 class ResultsTab(ttk.Frame):
@@ -21,6 +14,14 @@ class ResultsTab(ttk.Frame):
         self.equation_names = []
         self.equation_data = {}
         self.selected_name = None
+        self.last_id = None
+
+        # Results of finished calculations (decimated for the plot and in full
+        # for the tables) and the calculations in progress, by name
+        self.results = {}
+        self.table_results = {}
+        self.running = {}
+        self.zoom_task = None
 
         self.setup_ui()
         self.fetch_equations()
@@ -36,6 +37,11 @@ class ResultsTab(ttk.Frame):
 
         self.calculate_button = ttk.Button(selection_frame, text="Calculate", command=self.calculate)
         self.calculate_button.grid(row=0, column=2, padx=5)
+        self.equation_combobox.bind("<<ComboboxSelected>>", self.show_selected)
+
+        # One row with progress and a cancel button per running calculation
+        self.tasks_frame = ttk.Frame(self)
+        self.tasks_frame.pack(fill="x", padx=10)
 
         results_area = ttk.Frame(self)
         results_area.pack(pady=10, fill="both", expand=True, padx=10)
@@ -43,122 +49,209 @@ class ResultsTab(ttk.Frame):
         tables_frame = ttk.LabelFrame(results_area, text="Results Tables")
         tables_frame.pack(side="left", fill="y", padx=5, pady=5)
 
-        self.table1, _ = self._create_table(tables_frame, "Euler", row=0)
-        self.table2, _ = self._create_table(tables_frame, "Euler-Cauchy", row=1)
+        self.table1 = self._create_table(tables_frame, "Euler", row=0)
+        self.table2 = self._create_table(tables_frame, "Euler-Cauchy", row=1)
 
         self.plot_frame = ttk.LabelFrame(results_area, text="Plot")
         self.plot_frame.pack(side="right", fill="both", expand=True, padx=10, pady=5)
 
-        self.plot_placeholder()
+        self.plot = PlotCanvas(
+            self.plot_frame,
+            labels=("Euler method", "Euler-Cauchy method"),
+            colors=("black", "blue"),
+            on_xlim_changed=self.zoom,
+        )
+        self.plot.pack(fill="both", expand=True)
 
     def _create_table(self, parent, title, row):
-        """Helper method to create a table with a title label and vertical scrollbar."""
+        """Helper method to create a table with a title label."""
         frame = ttk.Frame(parent)
         frame.grid(row=row, column=0, padx=5, pady=5, sticky="nsew")
         ttk.Label(frame, text=title).pack(pady=2)
-        scrollbar = ttk.Scrollbar(frame, orient="vertical")
-        table = ttk.Treeview(
-            frame,
-            columns=("x", "y"),
-            show="headings",
-            yscrollcommand=scrollbar.set,
-            height=10,
+        table = VirtualTable(frame)
+        table.pack(side="left", fill="y")
+        return table
+
+    def fetch_equations(self, incremental=False):
+        """
+        Loads the equation list in the background. An incremental refresh
+        only fetches equations created since the last one.
+        """
+        after_id = self.last_id if incremental else None
+        self.app.tasks.submit(
+            lambda task: self.app.api.list_equations(after_id=after_id),
+            on_done=lambda equations: self._update_equations(equations, after_id is None),
+            on_error=lambda e: self._show_error("Could not fetch equations", e),
         )
-        table.heading("x", text="x")
-        table.heading("y", text="y")
-        table.pack(side="left", fill="y", padx=5)
-        scrollbar.config(command=table.yview)
-        scrollbar.pack(side="left", fill="y")
-        return table, scrollbar
-
-    def fetch_equations(self):
-        try:
-            response = requests.get(API_URL)
-            response.raise_for_status()
-            equations = response.json()
-
-            self.equation_names = [eq['name'] for eq in equations]
-            self.equation_data = {eq['name']: eq for eq in equations}
-
-            self.equation_combobox['values'] = ["Select"] + self.equation_names
+
+    def _update_equations(self, equations, full):
+        if full:
+            self.equation_data = {}
+        # The API returns the newest equations first.
+        for eq in reversed(equations):
+            self.equation_data[eq['name']] = eq
+        if equations:
+            self.last_id = max(eq['id'] for eq in equations)
+
+        self.equation_names = list(reversed(self.equation_data))
+        self.equation_combobox['values'] = ["Select"] + self.equation_names
+        if self.equation_combobox.get() not in self.equation_data:
             self.equation_combobox.set("Select")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Could not fetch equations: {e}")
-        except ValueError:
-            messagebox.showerror("Error", "Received invalid data from server.")
 
     def calculate(self):
-        self.selected_name = self.equation_combobox.get()
-        if self.selected_name == "Select" or not self.selected_name:
+        name = self.equation_combobox.get()
+        if name == "Select" or not name:
             messagebox.showerror("Error", "Please select a valid equation.")
             return
 
-        equation = self.equation_data.get(self.selected_name)
+        equation = self.equation_data.get(name)
         if not equation:
             messagebox.showerror("Error", "Selected equation not found.")
             return
+        if name in self.running:
+            return
 
-        try:
-            url = f"{API_URL}{equation['id']}"
-            response = requests.get(url)
-            response.raise_for_status()
-            results = response.json()
-            self.display_results(results)
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error", f"Calculation failed: {e}")
+        max_points = self._max_points()
+        row = self._add_task_row(name)
+        task = self.app.tasks.submit(
+            lambda task: self._load(equation['id'], task, max_points),
+            on_done=lambda results: self._calculation_done(name, *results),
+            on_error=lambda e: self._calculation_failed(name, e),
+            on_progress=lambda fraction, text: self._show_progress(row, fraction, text),
+        )
+        self.running[name] = (task, row)
+
+    def _load(self, equation_id, task, max_points):
+        """
+        Loads the trajectories decimated to max_points for the plot and
+        without decimation for the tables, which show every row. The second
+        request finds the solution stored by the first.
+        """
+        plot_results = self.app.api.trajectory(equation_id, task=task, max_points=max_points)
+        table_results = self.app.api.trajectory(equation_id, task=task)
+        return (plot_results, table_results)
+
+    def show_selected(self, event=None):
+        """Shows the results of the selected equation if it was calculated before."""
+        name = self.equation_combobox.get()
+        if name in self.results:
+            self.selected_name = name
+            self.display_results(self.results[name], self.table_results[name])
+
+    def _calculation_done(self, name, results, table_results):
+        self._remove_task(name)
+        self.results[name] = results
+        self.table_results[name] = table_results
+        if self.equation_combobox.get() == name:
+            self.show_selected()
+
+    def _calculation_failed(self, name, error):
+        self._remove_task(name)
+        self._show_error(f"Calculation of {name} failed", error)
+
+    def _show_error(self, message, error):
+        if isinstance(error, requests.exceptions.RequestException):
+            messagebox.showerror("Error", f"{message}: {error}")
+        elif isinstance(error, ValueError):
+            messagebox.showerror("Error", "Received invalid data from server.")
+        else:
+            raise error
+
+    def _add_task_row(self, name):
+        row = ttk.Frame(self.tasks_frame)
+        row.pack(fill="x", pady=2)
+        ttk.Label(row, text=name, width=25).pack(side="left")
+        row.progressbar = ttk.Progressbar(row, mode="indeterminate", length=200)
+        row.progressbar.pack(side="left", padx=5)
+        row.progressbar.start(10)
+        row.status_label = ttk.Label(row, text="Waiting...", foreground="gray")
+        row.status_label.pack(side="left", padx=5)
+        ttk.Button(row, text="Cancel", command=lambda: self._cancel(name)).pack(side="right")
+        return row
+
+    def _show_progress(self, row, fraction, text):
+        if fraction is None:
+            if str(row.progressbar['mode']) != "indeterminate":
+                row.progressbar.configure(mode="indeterminate")
+                row.progressbar.start(10)
+        else:
+            row.progressbar.stop()
+            row.progressbar.configure(mode="determinate", value=100 * fraction)
+        row.status_label.config(text=text)
+
+    def _cancel(self, name):
+        task, _ = self.running[name]
+        task.cancel()
+        self._remove_task(name)
+
+    def _remove_task(self, name):
+        _, row = self.running.pop(name)
+        row.destroy()
+
+    def display_results(self, results, table_results):
+        self.table1.set_data(table_results.get('x1_res', []),
+                             self._first_component(table_results.get('y1_res', [])))
+        self.table2.set_data(table_results.get('x2_res', []),
+                             self._first_component(table_results.get('y2_res', [])))
 
-    def display_results(self, results):
         x1_res = results.get('x1_res', [])
-        y1_res = results.get('y1_res', [])
+        y1_res = self._first_component(results.get('y1_res', []))
         x2_res = results.get('x2_res', [])
-        y2_res = results.get('y2_res', [])
-
-        for table in [self.table1, self.table2]:
-            table.delete(*table.get_children())
-
-        for x, y in zip(x1_res, y1_res):
-            self.table1.insert("", "end", values=(f"{x:.4f}", f"{y:.4f}"))
-        for x, y in zip(x2_res, y2_res):
-            self.table2.insert("", "end", values=(f"{x:.4f}", f"{y:.4f}"))
-
+        y2_res = self._first_component(results.get('y2_res', []))
         self.plot_results(x1_res, y1_res, x2_res, y2_res)
 
     def plot_results(self, x1_res, y1_res, x2_res, y2_res):
-        for widget in self.plot_frame.winfo_children():
-            widget.destroy()
-
-        fig = Figure(figsize=(8, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        ax.plot(x1_res, y1_res, label="Euler method", marker="o", color="black")
-        ax.plot(x2_res, y2_res, label="Euler-Cauchy method", marker="o", color="blue")
         func = self.equation_data[self.selected_name]['func']
-        ax.set_title(rf"Euler curves for function: {func}")
-        ax.set_xlabel("x")
-        ax.set_ylabel("y")
-        ax.minorticks_on()
-        ax.set_xlim(min(x1_res) - 0.5, max(x1_res) + 0.5)
-        ax.set_ylim(min(y1_res) - 0.5, max(y1_res) + 0.5)
-        ax.grid(which='major', linewidth=1.2)
-        ax.grid(which='minor', linewidth=0.5)
-        ax.legend()
-
-        canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.plot.show(rf"Euler curves for function: {func}", [(x1_res, y1_res), (x2_res, y2_res)])
 
     def plot_placeholder(self):
-        for widget in self.plot_frame.winfo_children():
-            widget.destroy()
-
-        fig = Figure(figsize=(8, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        ax.set_title("No data available")
-        ax.set_xlabel("x")
-        ax.set_ylabel("y")
-        ax.minorticks_on()
-        ax.grid(which='major', linewidth=1.2)
-        ax.grid(which='minor', linewidth=0.5)
-
-        canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.plot.clear()
+
+    def zoom(self, x_min, x_max):
+        """
+        Loads more detailed data for the visible x-range after zooming or
+        panning, the first request only has enough points for the full view.
+        """
+        results = self.results.get(self.selected_name)
+        if results is None or not len(results['x1_res']):
+            return
+        if self.zoom_task is not None:
+            self.zoom_task.cancel()
+
+        x_vals = results['x1_res']
+        if x_min <= x_vals[0] and x_max >= x_vals[-1]:
+            self.plot.update_data(self._series(results))
+            return
+
+        name = self.selected_name
+        equation = self.equation_data[name]
+        # A margin keeps the lines going to the edges of the plot while panning.
+        margin = 0.1 * (x_max - x_min)
+        params = {"max_points": self._max_points(), "x_min": x_min - margin, "x_max": x_max + margin}
+        self.zoom_task = self.app.tasks.submit(
+            lambda task: self.app.api.trajectory(equation['id'], task=task, cache=False, **params),
+            on_done=lambda detail: self._show_zoomed(name, (x_min, x_max), detail),
+            on_error=lambda e: self._show_error("Could not load details", e),
+        )
+
+    def _show_zoomed(self, name, x_range, results):
+        self.zoom_task = None
+        if name == self.selected_name and self.plot.x_range() == x_range:
+            self.plot.update_data(self._series(results))
+
+    def _max_points(self):
+        # Two points (min and max) per horizontal pixel are all the plot can show.
+        return 2 * max(self.plot_frame.winfo_width(), 800)
+
+    @classmethod
+    def _series(cls, results):
+        return [
+            (results['x1_res'], cls._first_component(results['y1_res'])),
+            (results['x2_res'], cls._first_component(results['y2_res'])),
+        ]
+
+    @staticmethod
+    def _first_component(values):
+        # Systems have one column per variable, y1 is the solution itself
+        # when a higher-order equation is written as a system.
+        return values[:, 0] if getattr(values, 'ndim', 1) > 1 else values
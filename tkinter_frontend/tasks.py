@@ -0,0 +1,96 @@
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Cancelled(Exception):
+    """Raised inside a task that was cancelled."""
+
+
+class Task:
+    """
+    Handle of a function running in the background. The function receives
+    the task and can report progress or check for cancellation through it.
+    """
+
+    def __init__(self, runner, on_done, on_error, on_progress):
+        self._runner = runner
+        self._cancel_event = threading.Event()
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check(self):
+        """Stop the task here if it was cancelled."""
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, fraction=None, text=""):
+        """
+        Report progress from the worker thread, fraction is None while the
+        amount of work is not known yet.
+        """
+        self.check()
+        if self.on_progress is not None:
+            self._runner._results.put((self, self.on_progress, (fraction, text)))
+
+
+class TaskRunner:
+    """
+    Runs network and decode work on a thread pool, off the Tk main loop.
+
+    Tk is not thread-safe, so workers never touch widgets: callbacks are
+    queued and called on the main thread by a loop scheduled with `after()`.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-worker")
+        self._results = queue.Queue()
+        self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None):
+        """
+        Run fn(task, *args) in the background. on_done gets its result,
+        on_error the exception it raised, both on the main thread. Nothing
+        is called for a task that was cancelled.
+        """
+        task = Task(self, on_done, on_error, on_progress)
+        self._executor.submit(self._run, task, fn, args)
+        return task
+
+    def _run(self, task, fn, args):
+        try:
+            result = fn(task, *args)
+        except Cancelled:
+            return
+        except Exception as e:
+            callback, value = task.on_error, e
+        else:
+            callback, value = task.on_done, result
+        if callback is not None:
+            self._results.put((task, callback, (value,)))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    task, callback, args = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if not task.cancelled:
+                    callback(*args)
+        finally:
+            self.root.after(self.poll_interval, self._poll)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,43 @@
+import json
+import struct
+
+import numpy as np
+
+
+MEDIA_TYPE = "application/vnd.diffsolver.trajectory"
+
+MAGIC = b"DSTR"
+PREAMBLE = struct.Struct("<4sB3xI")
+
+
+def decode(content):
+    """
+    Decode the binary trajectory format of the API into numpy arrays.
+
+    Arrays are read-only views into `content`, nothing is copied. The
+    server pads the header so every buffer starts at an offset divisible by
+    8, the views are aligned whenever `content` is. The y values of a
+    system come as a 2-D array with one column per variable.
+    """
+    magic, version, header_length = PREAMBLE.unpack_from(content)
+    if magic != MAGIC or version != 1:
+        raise ValueError("Not a trajectory response.")
+
+    offset = PREAMBLE.size
+    header = json.loads(bytes(content[offset:offset + header_length]))
+    offset += header_length
+
+    results = dict(header["meta"])
+    for array in header["arrays"]:
+        values = np.frombuffer(content, dtype="<f8", count=array["length"], offset=offset)
+        if "shape" in array:
+            values = values.reshape(array["shape"])
+        results[array["name"]] = values
+        offset += 8 * array["length"]
+
+    grid = header["grid"]
+    if grid is not None:
+        x0, h, n = grid["x0"], grid["h"], grid["n"]
+        x_vals = np.linspace(x0, x0 + h * (n - 1), n)
+        results["x1_res"] = results["x2_res"] = x_vals
+    return results
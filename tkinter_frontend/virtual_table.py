@@ -0,0 +1,90 @@
+import numpy as np
+
+from tkinter import ttk
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Table of numpy columns that only renders the visible rows.
+
+    The Treeview holds one item per visible row and the scrollbar maps to an
+    offset into the arrays, so scrolling updates a screenful of items instead
+    of inserting one item per data row. Values are formatted when they come
+    into view, memory and draw time do not depend on the number of rows.
+    """
+
+    def __init__(self, parent, columns=("x", "y"), height=10, fmt="{:.4f}"):
+        super().__init__(parent)
+        self.fmt = fmt
+        self.data = tuple(np.empty(0) for _ in columns)
+        self.offset = 0
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height, selectmode="none")
+        for column in columns:
+            self.tree.heading(column, text=column)
+        self.tree.pack(side="left", fill="y", padx=5)
+        self.scrollbar.pack(side="left", fill="y")
+
+        self.items = []
+        self._resize(height)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+
+    @property
+    def row_count(self):
+        return len(self.data[0])
+
+    def set_data(self, *columns):
+        """Shows new columns from the first row on."""
+        self.data = tuple(np.asarray(column) for column in columns)
+        self.offset = 0
+        self._render()
+
+    def scroll(self, rows):
+        self.offset += rows
+        self._render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.offset = int(float(value) * self.row_count)
+        elif action == "scroll":
+            self.offset += int(value) * (len(self.items) if unit == "pages" else 1)
+        self._render()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_configure(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # The heading takes about one row.
+        visible = max(1, event.height // rowheight - 1)
+        if visible != len(self.items):
+            self._resize(visible)
+
+    def _resize(self, n_items):
+        while len(self.items) < n_items:
+            self.items.append(self.tree.insert("", "end", values=("",) * len(self.data)))
+        while len(self.items) > n_items:
+            self.tree.delete(self.items.pop())
+        self._render()
+
+    def _render(self):
+        n_rows = self.row_count
+        self.offset = max(0, min(self.offset, n_rows - len(self.items)))
+        for i, item in enumerate(self.items):
+            row = self.offset + i
+            if row < n_rows:
+                values = [self.fmt.format(column[row]) for column in self.data]
+            else:
+                values = [""] * len(self.data)
+            self.tree.item(item, values=values)
+
+        if n_rows:
+            self.scrollbar.set(self.offset / n_rows, min(1.0, (self.offset + len(self.items)) / n_rows))
+        else:
+            self.scrollbar.set(0.0, 1.0)